@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Category, Location, Post
+from .search import get_search_backend
 
 # Register your models here.
 
@@ -27,6 +28,18 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title',) 
     list_filter = ('category',)
     list_display_links = ('title',)
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу, а не LIKE по search_fields;
+        # в админке видны и неопубликованные посты.
+        backend = get_search_backend()
+        if backend is None or not search_term.strip():
+            return super().get_search_results(
+                request, queryset, search_term)
+        ids = backend.search(search_term, visible_only=False).ids(
+            self.search_limit)
+        return queryset.filter(pk__in=ids), False
 
 
 class CategoryAdmin(admin.ModelAdmin):
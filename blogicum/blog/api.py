@@ -0,0 +1,260 @@
+import json
+from functools import wraps
+
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition, require_safe
+
+from core.cache import page_etag
+from core.queries import query_budget
+
+from . import cache
+from .export import json_default
+from .models import Category, Comment, Post
+from .paginators import KeysetPaginator
+from .views import (COMMENTS_PER_PAGE, POSTS_PER_PAGE, get_feed,
+                    get_request_profile)
+
+CONTENT_TYPE = 'application/json; charset=utf-8'
+FIELDS_PARAM = 'fields'
+
+# Поле ответа -> поля .values(), из которых оно складывается.
+POST_FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'text': ('text',),
+    'pub_date': ('pub_date',),
+    'updated_at': ('updated_at',),
+    'author': ('author__username',),
+    'category': ('category__slug',),
+    'location': ('location__name', 'location__is_published'),
+    'image': ('image',),
+    'comment_count': ('comment_count',),
+}
+# Текст поста — самая тяжёлая колонка: в списках он только по запросу.
+LIST_FIELDS = tuple(name for name in POST_FIELDS if name != 'text')
+COMMENT_FIELDS = {
+    'id': ('id',),
+    'text': ('text',),
+    'created_at': ('created_at',),
+    'author': ('author__username',),
+}
+
+
+def _location(name, is_published):
+    # Как в шаблонах: снятое с публикации место не показываем.
+    return name if is_published else None
+
+
+def _image(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+CONVERTERS = {
+    'location': _location,
+    'image': _image,
+}
+
+
+class RowSerializer:
+    """Собирает словари ответа из строк `.values()`.
+
+    План (какие колонки читать и как из них получить поле) строится один
+    раз на запрос, а строки превращаются в словари без создания
+    экземпляров моделей. `id` входит в ответ всегда и идёт первым.
+    """
+
+    def __init__(self, fields, names):
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            raise ValueError(
+                'Неизвестные поля: ' + ', '.join(unknown) + '.')
+        names = ['id'] + [name for name in dict.fromkeys(names)
+                          if name != 'id']
+        self.names = names
+        self.plan = [
+            (name, fields[name], CONVERTERS.get(name)) for name in names
+        ]
+        self.paths = list(dict.fromkeys(
+            path for _, paths, _ in self.plan for path in paths))
+
+    @classmethod
+    def from_request(cls, request, fields, default):
+        raw = request.GET.get(FIELDS_PARAM)
+        if raw is None:
+            return cls(fields, default)
+        return cls(
+            fields, [name.strip() for name in raw.split(',') if name.strip()])
+
+    def serialize(self, row):
+        result = {}
+        for name, paths, convert in self.plan:
+            if convert is None:
+                result[name] = row[paths[0]]
+            else:
+                result[name] = convert(*(row[path] for path in paths))
+        return result
+
+    def dumps(self, row):
+        return json.dumps(
+            self.serialize(row), ensure_ascii=False, default=json_default)
+
+
+def _page_url(request, cursor_param, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params[cursor_param] = cursor
+    return request.build_absolute_uri(
+        f'{request.path}?{params.urlencode()}')
+
+
+def stream_page(request, page, serializer, cursor_param):
+    """JSON-объект страницы по кускам: строки сериализуются по одной."""
+    yield '{"results":['
+    for index, row in enumerate(page):
+        yield (',' if index else '') + serializer.dumps(row)
+    yield '],"next":{},"previous":{}}}'.format(
+        json.dumps(_page_url(request, cursor_param, page.next_cursor)),
+        json.dumps(_page_url(request, cursor_param, page.previous_cursor)),
+    )
+
+
+def _json_response(chunks):
+    return StreamingHttpResponse(chunks, content_type=CONTENT_TYPE)
+
+
+def _bad_request(error):
+    return JsonResponse(
+        {'error': str(error)}, status=400,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def _post_list(request, keys):
+    """Страница постов по курсору: ключи (pub_date, pk) из `keys`.
+
+    Пагинируются только ключи, а колонки, запрошенные в `?fields=`,
+    дочитываются для страницы одним запросом.
+    """
+    try:
+        serializer = RowSerializer.from_request(
+            request, POST_FIELDS, LIST_FIELDS)
+    except ValueError as error:
+        return _bad_request(error)
+
+    def resolve(rows):
+        posts = {
+            post['id']: post for post in Post.objects.filter(
+                pk__in=[row['pk'] for row in rows],
+            ).values(*serializer.paths)
+        }
+        return [posts[row['pk']] for row in rows if row['pk'] in posts]
+
+    paginator = KeysetPaginator(
+        keys.values('pk', 'pub_date'), POSTS_PER_PAGE, resolve=resolve)
+    page = paginator.get_page(request.GET.get(paginator.cursor_param))
+    return _json_response(
+        stream_page(request, page, serializer, paginator.cursor_param))
+
+
+@query_budget(5)
+@require_safe
+@condition(etag_func=cache.index_etag)
+def index(request):
+    return _post_list(request, get_feed())
+
+
+@query_budget(6)
+@require_safe
+@condition(etag_func=cache.category_etag)
+def category_posts(request, category_slug):
+    category = get_object_or_404(
+        Category, slug=category_slug, is_published=True)
+    return _post_list(request, get_feed(category=category))
+
+
+def profile_etag(request, username):
+    return cache.author_etag(
+        request, get_request_profile(request, username).pk)
+
+
+@query_budget(6)
+@require_safe
+@condition(etag_func=profile_etag)
+def profile(request, username):
+    profile = get_request_profile(request, username)
+    if request.user == profile:
+        # Автор видит и свои снятые и отложенные посты, как в HTML.
+        return _post_list(request, Post.objects.filter(author=profile))
+    return _post_list(request, get_feed().filter(author=profile))
+
+
+def get_request_post(request, id):
+    """Строка поста с колонками из `?fields=`; одна на запрос.
+
+    Видимость та же, что у `get_post_for`: автор видит свой пост всегда,
+    остальные — только вышедший в ленту.
+    """
+    if getattr(request, 'api_post', None) is None:
+        serializer = RowSerializer.from_request(
+            request, POST_FIELDS, POST_FIELDS)
+        visible = Q(feed_entry__pub_date__lte=timezone.now())
+        if request.user.is_authenticated:
+            visible |= Q(author_id=request.user.pk)
+        row = Post.objects.filter(visible, pk=id).values(
+            *serializer.paths, 'updated_at').first()
+        if row is None:
+            raise Http404('Публикация не найдена.')
+        request.api_post = serializer, row
+    return request.api_post
+
+
+def post_etag(request, id):
+    _, row = get_request_post(request, id)
+    return page_etag(request, (), row['updated_at'].isoformat())
+
+
+def post_last_modified(request, id):
+    _, row = get_request_post(request, id)
+    return row['updated_at']
+
+
+def _checked_post(view):
+    """Ошибку в `?fields=` отдаём как 400 до валидаторов `condition`."""
+    @wraps(view)
+    def wrapper(request, id):
+        try:
+            get_request_post(request, id)
+        except ValueError as error:
+            return _bad_request(error)
+        return view(request, id)
+    return wrapper
+
+
+@query_budget(4)
+@require_safe
+@_checked_post
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_detail(request, id):
+    serializer, row = get_request_post(request, id)
+    comment_serializer = RowSerializer(COMMENT_FIELDS, COMMENT_FIELDS)
+    paginator = KeysetPaginator(
+        Comment.objects.filter(post_id=id).values(
+            *comment_serializer.paths),
+        COMMENTS_PER_PAGE,
+        ordering=('created_at', 'pk'),
+        cursor_param='comments',
+    )
+    comments = paginator.get_page(request.GET.get(paginator.cursor_param))
+
+    def chunks():
+        yield '{"post":' + serializer.dumps(row) + ',"comments":'
+        yield from stream_page(
+            request, comments, comment_serializer, paginator.cursor_param)
+        yield '}'
+    return _json_response(chunks())
@@ -0,0 +1,15 @@
+from core.aio import with_async_views
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+# Те же маршруты, что в blog.urls, но страницы чтения — асинхронные.
+urlpatterns = with_async_views(urls.urlpatterns, {
+    'index': async_views.index,
+    'category_posts': async_views.category_posts,
+    'post_detail': async_views.post_detail,
+    'profile': async_views.profile,
+    'export_posts': async_views.export_posts,
+    'sitemap_shard': async_views.sitemap_shard,
+})
@@ -0,0 +1,108 @@
+import asyncio
+
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response
+
+from core.aio import (
+    async_condition,
+    database_sync_to_async,
+    evaluate_validators,
+    spooled_view,
+    with_validators,
+)
+from core.cache import cache_page_for_anonymous
+from core.queries import query_budget
+
+from . import cache, sitemaps, views
+from .forms import CommentForm
+from .models import Category
+from .views import (
+    get_comments_page,
+    get_feed,
+    get_profile_page,
+    get_request_profile,
+    load_posts,
+    paginate_posts,
+    post_etag,
+    post_last_modified,
+    profile_etag,
+)
+
+# Логика та же, что у `blog.views`, и собрана из тех же функций. Работа
+# с базой и отрисовка шаблонов (она читает сессию и ленивые queryset)
+# идут в ограниченном пуле `core.aio`, независимые выборки — параллельно.
+render_async = database_sync_to_async(render)
+
+
+def _render_index(request):
+    page_obj = paginate_posts(request, get_feed(), resolve=load_posts)
+    return render(request, 'blog/index.html', {'page_obj': page_obj})
+
+
+@query_budget(5)
+@async_condition(etag_func=cache.index_etag)
+@cache_page_for_anonymous(cache.index_scopes, cache.index_cache_timeout)
+async def index(request):
+    return await database_sync_to_async(_render_index)(request)
+
+
+@query_budget(6)
+@async_condition(etag_func=cache.category_etag)
+@cache_page_for_anonymous(cache.category_scopes, cache.category_cache_timeout)
+async def category_posts(request, category_slug):
+    # Страница ленты выбирается по slug, а не по найденной категории,
+    # поэтому обе выборки идут одновременно.
+    category, page_obj = await asyncio.gather(
+        database_sync_to_async(get_object_or_404)(
+            Category, slug=category_slug, is_published=True),
+        database_sync_to_async(paginate_posts)(
+            request,
+            get_feed().filter(category__slug=category_slug),
+            resolve=load_posts,
+        ),
+    )
+    return await render_async(
+        request,
+        'blog/category.html',
+        {'category': category, 'page_obj': page_obj},
+    )
+
+
+@query_budget(4)
+async def post_detail(request, id):
+    # Комментарии читаются параллельно с постом и валидаторами: ответ 304
+    # обходится лишним запросом, зато обычный ответ ждёт не сумму
+    # выборок, а самую долгую из них.
+    (etag, last_modified), comments = await asyncio.gather(
+        database_sync_to_async(evaluate_validators)(
+            request, post_etag, post_last_modified, id),
+        database_sync_to_async(get_comments_page)(request, id),
+    )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await render_async(request, 'blog/detail.html', {
+            'post': request.blog_post,
+            'form': CommentForm(),
+            'comments': comments,
+        })
+    return with_validators(request, response, etag, last_modified)
+
+
+def _render_profile(request, username):
+    profile = get_request_profile(request, username)
+    return render(request, 'blog/profile.html', {
+        'profile': profile,
+        'page_obj': get_profile_page(request, profile),
+    })
+
+
+@query_budget(6)
+@async_condition(etag_func=profile_etag)
+async def profile(request, username):
+    return await database_sync_to_async(_render_profile)(request, username)
+
+
+# Потоковые ответы с чтением базы в генераторе: тело собирается в пуле.
+export_posts = spooled_view(views.export_posts)
+sitemap_shard = spooled_view(sitemaps.sitemap_shard)
@@ -0,0 +1,241 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.queries import QueryCounter
+
+from .models import Category, FeedEntry, Post, User
+
+# Во сколько раз метрика может вырасти относительно базовой без ошибки.
+DEFAULT_THRESHOLD = 1.25
+# Абсолютный допуск для задержки: шум на миллисекундных ответах велик.
+LATENCY_SLACK_MS = 2.0
+
+
+@dataclass
+class Scenario:
+    """Один замеряемый запрос.
+
+    `url` и `data` — функции от `BenchmarkContext`; `login` — выполнять ли
+    запрос от имени пользователя (иначе анонимно).
+    """
+
+    name: str
+    url: object
+    method: str = 'get'
+    data: object = None
+    login: bool = True
+    expected_status: tuple = (200,)
+
+
+@dataclass
+class BenchmarkContext:
+    viewer: User
+    author: User
+    category: Category
+    post: Post
+    counter: list = field(default_factory=lambda: [0])
+
+    def next_number(self):
+        self.counter[0] += 1
+        return self.counter[0]
+
+    @classmethod
+    def from_database(cls):
+        """Выбирает самые «тяжёлые» объекты: так замер ближе к худшему."""
+        now = timezone.now()
+        feed = FeedEntry.objects.filter(pub_date__lte=now)
+        category_id = feed.values('category').annotate(
+            total=Count('pk'),
+        ).order_by('-total').values_list('category', flat=True).first()
+        author_id = feed.values('author').annotate(
+            total=Count('pk'),
+        ).order_by('-total').values_list('author', flat=True).first()
+        post = Post.objects.filter(
+            feed_entry__pub_date__lte=now,
+        ).order_by('-comment_count', 'pk').first()
+        if post is None:
+            raise ValueError('В базе нет видимых публикаций для замеров.')
+        author = User.objects.get(pk=author_id)
+        viewer = User.objects.exclude(pk=author_id).order_by('pk').first()
+        return cls(
+            viewer=viewer or author,
+            author=author,
+            category=Category.objects.get(pk=category_id),
+            post=post,
+        )
+
+
+SCENARIOS = (
+    Scenario('index', lambda ctx: reverse('blog:index')),
+    Scenario(
+        'index:anonymous', lambda ctx: reverse('blog:index'), login=False),
+    Scenario(
+        'category_posts',
+        lambda ctx: reverse('blog:category_posts', args=(ctx.category.slug,)),
+    ),
+    Scenario(
+        'post_detail',
+        lambda ctx: reverse('blog:post_detail', args=(ctx.post.pk,)),
+    ),
+    Scenario(
+        'profile',
+        lambda ctx: reverse('blog:profile', args=(ctx.author.username,)),
+    ),
+    Scenario(
+        'add_comment',
+        lambda ctx: reverse('blog:add_comment', args=(ctx.post.pk,)),
+        method='post',
+        data=lambda ctx: {'text': f'Замер {ctx.next_number()}'},
+        expected_status=(302,),
+    ),
+    Scenario(
+        'create_post',
+        lambda ctx: reverse('blog:create_post'),
+        method='post',
+        data=lambda ctx: {
+            'title': f'Замер {ctx.next_number()}',
+            'text': 'Текст публикации для замера.',
+            'pub_date': timezone.now().strftime('%Y-%m-%d %H:%M'),
+            'category': ctx.category.pk,
+            'is_published': True,
+        },
+        expected_status=(302,),
+    ),
+    Scenario('pages:about', lambda ctx: reverse('pages:about'), login=False),
+    Scenario('pages:rules', lambda ctx: reverse('pages:rules'), login=False),
+)
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class BenchmarkRunner:
+    """Замеряет представления тестовым клиентом.
+
+    Для каждого сценария: `warmup` прогревочных запросов, затем
+    `iterations` замеров времени, число SQL-запросов последнего замера и
+    пик выделенной памяти отдельного запроса под tracemalloc (он сильно
+    замедляет код, поэтому во время замеров времени выключен).
+    """
+
+    def __init__(self, iterations=30, warmup=3, scenarios=SCENARIOS):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.scenarios = scenarios
+
+    def run(self, context=None):
+        context = context or BenchmarkContext.from_database()
+        anonymous = Client()
+        logged_in = Client()
+        logged_in.force_login(context.viewer)
+        return {
+            scenario.name: self.measure(
+                scenario,
+                logged_in if scenario.login else anonymous,
+                context,
+            )
+            for scenario in self.scenarios
+        }
+
+    def request(self, scenario, client, context):
+        data = scenario.data(context) if scenario.data else None
+        response = getattr(client, scenario.method)(
+            scenario.url(context), data)
+        if response.status_code not in scenario.expected_status:
+            raise AssertionError(
+                f'{scenario.name}: ответ {response.status_code}, '
+                f'ожидался {scenario.expected_status}'
+            )
+        return response
+
+    def measure(self, scenario, client, context):
+        for _ in range(self.warmup):
+            self.request(scenario, client, context)
+
+        timings = []
+        for _ in range(self.iterations):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                self.request(scenario, client, context)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        tracemalloc.start()
+        try:
+            self.request(scenario, client, context)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'iterations': len(timings),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': counter.count,
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Список регрессий относительно базовых результатов.
+
+    Медиана задержки и пик памяти могут вырасти не больше чем в
+    `threshold` раз (к задержке добавляется `LATENCY_SLACK_MS`: хвосты
+    распределения слишком шумные для порога). Число запросов
+    детерминировано и расти не должно вовсе.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {current["queries"]} '
+                f'вместо {base["queries"]}'
+            )
+        latency_limit = base['p50_ms'] * threshold + LATENCY_SLACK_MS
+        if current['p50_ms'] > latency_limit:
+            regressions.append(
+                f'{name}: медиана {current["p50_ms"]} мс '
+                f'при допустимых {latency_limit:.1f} мс'
+            )
+        if current['peak_kib'] > base['peak_kib'] * threshold:
+            regressions.append(
+                f'{name}: пик памяти {current["peak_kib"]} КиБ '
+                f'вместо {base["peak_kib"]} КиБ'
+            )
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def save_results(path, results, meta=None):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {'meta': meta or {}, 'results': results},
+            file,
+            ensure_ascii=False,
+            indent=2,
+            sort_keys=True,
+        )
+        file.write('\n')
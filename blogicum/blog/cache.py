@@ -0,0 +1,133 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.cache import bump_versions, page_etag
+
+from .models import FeedEntry
+
+# Области кеша анонимных страниц ленты (см. core.cache).
+FEED_SCOPE = 'feed'
+SHARED_SCOPE = 'feed:shared'
+
+PUBLICATION_QUEUE_KEY = 'publication-queue'
+PUBLICATION_QUEUE_SIZE = 500
+
+
+def category_scope(slug):
+    return f'feed:category:{slug}'
+
+
+def author_scope(author_id):
+    return f'feed:author:{author_id}'
+
+
+def index_scopes(request):
+    return [FEED_SCOPE, SHARED_SCOPE]
+
+
+def category_scopes(request, category_slug):
+    return [category_scope(category_slug), SHARED_SCOPE]
+
+
+def author_scopes(request, author_id):
+    return [author_scope(author_id), SHARED_SCOPE]
+
+
+def invalidate_feeds(category_slugs=(), index=True, shared=False,
+                     authors=()):
+    scopes = [category_scope(slug) for slug in category_slugs if slug]
+    scopes += [author_scope(pk) for pk in authors if pk]
+    if index:
+        scopes.append(FEED_SCOPE)
+    if shared:
+        scopes.append(SHARED_SCOPE)
+    bump_versions(*scopes)
+
+
+def get_publication_queue():
+    """Ближайшие отложенные публикации: (pub_date, slug, author_id).
+
+    Очередь читается из витрины ленты и кешируется; сигналы сбрасывают
+    её при изменении постов и категорий. В ней не больше
+    `PUBLICATION_QUEUE_SIZE` элементов.
+    """
+    queue = cache.get(PUBLICATION_QUEUE_KEY)
+    if queue is None:
+        queue = list(
+            FeedEntry.objects.filter(pub_date__gt=timezone.now())
+            .order_by('pub_date')
+            .values_list('pub_date', 'category__slug', 'author_id')
+            [:PUBLICATION_QUEUE_SIZE]
+        )
+        cache.set(PUBLICATION_QUEUE_KEY, queue,
+                  settings.ANONYMOUS_PAGE_CACHE_TIMEOUT)
+    return queue
+
+
+def reset_publication_queue():
+    cache.delete(PUBLICATION_QUEUE_KEY)
+
+
+def next_publication_time(category_slug=None, now=None, author_id=None):
+    """Момент, когда лента (категории, автора) изменится сама собой."""
+    now = now or timezone.now()
+    queue = get_publication_queue()
+    for pub_date, slug, author in queue:
+        if (pub_date > now and category_slug in (None, slug)
+                and author_id in (None, author)):
+            return pub_date
+    if len(queue) >= PUBLICATION_QUEUE_SIZE:
+        # Очередь обрезана: дальше её конца заглядывать нельзя.
+        return queue[-1][0]
+    return None
+
+
+def seconds_until_next_publication(category_slug=None):
+    """Сколько секунд закешированная лента остаётся верной.
+
+    Отложенная публикация появится в ленте сама, без сигнала, поэтому
+    страница не должна жить в кеше дольше момента её выхода.
+    """
+    now = timezone.now()
+    next_pub_date = next_publication_time(category_slug, now=now)
+    timeout = settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+    if next_pub_date is None:
+        return timeout
+    return max(
+        0,
+        min(timeout, math.ceil((next_pub_date - now).total_seconds())),
+    )
+
+
+def index_cache_timeout(request):
+    return seconds_until_next_publication()
+
+
+def category_cache_timeout(request, category_slug):
+    return seconds_until_next_publication(category_slug)
+
+
+def index_etag(request):
+    # Отложенный пост появится без сигнала: в тег входит ближайший
+    # момент публикации, после него тег меняется сам.
+    return page_etag(request, index_scopes(request), next_publication_time())
+
+
+def category_etag(request, category_slug):
+    return page_etag(
+        request,
+        category_scopes(request, category_slug),
+        next_publication_time(category_slug),
+    )
+
+
+def author_etag(request, author_id):
+    # Не полагаемся на планировщик: он может отставать или не работать.
+    return page_etag(
+        request,
+        author_scopes(request, author_id),
+        next_publication_time(author_id=author_id),
+    )
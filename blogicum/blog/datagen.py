@@ -0,0 +1,215 @@
+import bisect
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .loader import (
+    explicit_timestamps,
+    rebuild_derived_data,
+    reset_sequences,
+)
+from .models import Category, Comment, Location, Post, User
+
+WORDS = (
+    'утро день вечер ночь город море горы лес река дорога поезд самолёт '
+    'друг кот собака книга музыка кино кофе чай дождь снег солнце ветер '
+    'работа отпуск проект встреча история письмо мечта план шаг путь '
+    'новый старый тихий яркий долгий быстрый тёплый холодный важный '
+    'смотреть думать писать читать ждать искать найти увидеть вспомнить'
+).split()
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа: первый элемент самый частый."""
+    weights = [1 / rank ** exponent for rank in range(1, count + 1)]
+    return list(itertools.accumulate(weights))
+
+
+class BlogDataGenerator:
+    """Синтетический корпус блога для нагрузочных замеров.
+
+    Распределения неравномерные, как в живом блоге: авторы и категории
+    выбираются по закону Ципфа, комментарии достаются в основном
+    популярным постам. Часть постов отложена в будущее, часть снята с
+    публикации. Одинаковый `seed` даёт одинаковые данные (даты
+    отсчитываются от `now`). Строки вставляются через bulk_create с
+    явными id пачками по `batch_size`, поэтому память не растёт с объёмом.
+    """
+
+    def __init__(self, users=50, categories=8, locations=30, posts=5000,
+                 comments=20000, seed=0, batch_size=1000, days=365,
+                 future_ratio=0.05, unpublished_ratio=0.05, now=None):
+        self.counts = {
+            'users': users,
+            'categories': categories,
+            'locations': locations,
+            'posts': posts,
+            'comments': comments,
+        }
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.future_ratio = future_ratio
+        self.unpublished_ratio = unpublished_ratio
+        self.now = now or timezone.now()
+
+    def generate(self, rebuild=True):
+        with transaction.atomic(), explicit_timestamps(
+                *(model._meta.get_field(name) for model, name in (
+                    (Category, 'created_at'),
+                    (Location, 'created_at'),
+                    (Post, 'created_at'),
+                    (Post, 'updated_at'),
+                    (Comment, 'created_at'),
+                ))):
+            user_ids = self.create_users()
+            category_ids = self.create_categories()
+            location_ids = self.create_locations()
+            posts = self.create_posts(user_ids, category_ids, location_ids)
+            self.create_comments(user_ids, posts)
+            reset_sequences((User, Category, Location, Post, Comment))
+        if rebuild:
+            rebuild_derived_data()
+        return self.counts
+
+    def first_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize() + '.'
+
+    def past(self, max_days=None):
+        seconds = self.rng.uniform(0, (max_days or self.days) * 86400)
+        return self.now - timedelta(seconds=seconds)
+
+    def insert(self, model, objects):
+        """bulk_create пачками из генератора объектов."""
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                return
+            model.objects.bulk_create(batch)
+
+    def create_users(self):
+        start = self.first_id(User)
+        ids = range(start, start + self.counts['users'])
+        self.insert(User, (
+            User(
+                pk=pk,
+                username=f'gen_user_{pk}',
+                password=UNUSABLE_PASSWORD_PREFIX,
+                date_joined=self.past(),
+            )
+            for pk in ids
+        ))
+        return list(ids)
+
+    def create_categories(self):
+        start = self.first_id(Category)
+        ids = range(start, start + self.counts['categories'])
+        self.insert(Category, (
+            Category(
+                pk=pk,
+                title=self.text(2),
+                slug=f'gen-{pk}',
+                description=self.text(12),
+                # Последняя категория из нескольких скрыта целиком.
+                is_published=index < 3 or index < len(ids) - 1,
+                created_at=self.past(),
+            )
+            for index, pk in enumerate(ids)
+        ))
+        return list(ids)
+
+    def create_locations(self):
+        start = self.first_id(Location)
+        ids = range(start, start + self.counts['locations'])
+        self.insert(Location, (
+            Location(
+                pk=pk,
+                name=self.text(2),
+                is_published=self.rng.random() > 0.1,
+                created_at=self.past(),
+            )
+            for pk in ids
+        ))
+        return list(ids)
+
+    def create_posts(self, user_ids, category_ids, location_ids):
+        """Возвращает [(id, pub_date)] созданных постов."""
+        start = self.first_id(Post)
+        authors = zipf_weights(len(user_ids), 1.1)
+        categories = zipf_weights(len(category_ids), 0.8)
+        created = []
+
+        def posts():
+            for pk in range(start, start + self.counts['posts']):
+                if self.rng.random() < self.future_ratio:
+                    pub_date = self.now + timedelta(
+                        seconds=self.rng.uniform(60, 30 * 86400))
+                    created_at = self.past(7)
+                else:
+                    pub_date = self.past()
+                    created_at = pub_date
+                created.append((pk, pub_date))
+                yield Post(
+                    pk=pk,
+                    title=self.text(self.rng.randint(2, 8)),
+                    text=' '.join(
+                        self.text(self.rng.randint(5, 20))
+                        for _ in range(self.rng.randint(1, 10))
+                    ),
+                    pub_date=pub_date,
+                    author_id=self.rng.choices(
+                        user_ids, cum_weights=authors)[0],
+                    category_id=self.rng.choices(
+                        category_ids, cum_weights=categories)[0],
+                    location_id=(
+                        self.rng.choice(location_ids)
+                        if location_ids and self.rng.random() < 0.7
+                        else None
+                    ),
+                    is_published=self.rng.random() >= self.unpublished_ratio,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+        self.insert(Post, posts())
+        return created
+
+    def create_comments(self, user_ids, posts):
+        # Отложенные посты ещё никто не видел и не комментировал.
+        posts = [post for post in posts if post[1] <= self.now]
+        if not posts:
+            return
+        start = self.first_id(Comment)
+        # Популярность поста — тоже по Ципфу, но в случайном порядке.
+        popularity = zipf_weights(len(posts), 1.0)
+        order = list(range(len(posts)))
+        self.rng.shuffle(order)
+        total = popularity[-1]
+
+        def comments():
+            for pk in range(start, start + self.counts['comments']):
+                index = bisect.bisect(popularity, self.rng.random() * total)
+                post_id, pub_date = posts[order[min(index, len(posts) - 1)]]
+                created_at = min(
+                    self.now,
+                    pub_date + timedelta(
+                        seconds=self.rng.expovariate(1 / 86400)),
+                )
+                yield Comment(
+                    pk=pk,
+                    post_id=post_id,
+                    author_id=self.rng.choice(user_ids),
+                    text=self.text(self.rng.randint(3, 30)),
+                    created_at=created_at,
+                )
+
+        self.insert(Comment, comments())
@@ -0,0 +1,94 @@
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+
+from .models import Post
+
+# Колонка выгрузки -> путь поля в .values().
+EXPORT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'created_at': 'created_at',
+    'is_published': 'is_published',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'location': 'location__name',
+    'comment_count': 'comment_count',
+}
+CHUNK_SIZE = 2000
+
+
+def _bound(value, end=False):
+    """Дата превращается в начало дня (для `until` — следующего)."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if end:
+        value += datetime.timedelta(days=1)
+    return timezone.make_aware(
+        datetime.datetime.combine(value, datetime.time.min))
+
+
+def export_rows(since=None, until=None, category=None, author=None,
+                chunk_size=CHUNK_SIZE):
+    """Строки выгрузки постов по одной, в порядке id.
+
+    `since`/`until` — дата или момент по `pub_date`; дата `until`
+    включается целиком. Строки читаются курсором по `chunk_size` за раз,
+    поэтому память не зависит от размера выгрузки.
+    """
+    posts = Post.objects.order_by('pk')
+    if since:
+        posts = posts.filter(pub_date__gte=_bound(since))
+    if until:
+        if isinstance(until, datetime.datetime):
+            posts = posts.filter(pub_date__lte=until)
+        else:
+            posts = posts.filter(pub_date__lt=_bound(until, end=True))
+    if category:
+        posts = posts.filter(category__slug=category)
+    if author:
+        posts = posts.filter(author__username=author)
+    columns = list(EXPORT_FIELDS)
+    rows = posts.values_list(*EXPORT_FIELDS.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, row))
+
+
+def json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=json_default) + '\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if isinstance(value, datetime.datetime)
+            else value
+            for value in row.values()
+        )
+
+
+# Формат -> (генератор строк, Content-Type, расширение файла).
+FORMATS = {
+    'jsonl': (render_jsonl, 'application/x-ndjson', 'jsonl'),
+    'csv': (render_csv, 'text/csv', 'csv'),
+}
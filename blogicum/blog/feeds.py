@@ -0,0 +1,353 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.views.decorators.http import condition
+
+from core.cache import bump_versions, get_versions
+from core.queries import query_budget
+
+from .cache import SHARED_SCOPE
+from .models import Category, FeedEntry, Post, User
+
+FEED_SIZE = 20
+# Документ ленты живёт долго: его поддерживают сигналы, а не таймаут.
+DOCUMENT_TIMEOUT = 60 * 60 * 24
+SYNDICATION_SCOPE = 'syndication'
+DOCUMENT_KEY_PREFIX = 'syndication:'
+FORMATS = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+}
+
+
+def invalidate_documents():
+    """Сбрасывает все документы лент, например после смены категории."""
+    bump_versions(SYNDICATION_SCOPE)
+
+
+def document_key(kind, value=''):
+    """Ключ документа: `kind` — 'site', 'category' (id) или 'author' (id)."""
+    versions = get_versions([SYNDICATION_SCOPE, SHARED_SCOPE])
+    return f'{DOCUMENT_KEY_PREFIX}{":".join(versions)}:{kind}:{value}'
+
+
+def _sort_key(item):
+    return item['pub_date'], item['id']
+
+
+def _belongs(kind, value, post):
+    if kind == 'category':
+        return post.category_id == value
+    if kind == 'author':
+        return post.author_id == value
+    return True
+
+
+def _visible_posts(kind, value, until, since=None):
+    """Те же правила видимости, что у `get_posts`: витрина и pub_date."""
+    posts = Post.objects.select_related('category', 'author').filter(
+        feed_entry__pub_date__lte=until,
+    )
+    if since is not None:
+        posts = posts.filter(feed_entry__pub_date__gt=since)
+    if kind == 'category':
+        posts = posts.filter(feed_entry__category=value)
+    elif kind == 'author':
+        posts = posts.filter(feed_entry__author=value)
+    return posts.order_by('-feed_entry__pub_date', '-pk')[:FEED_SIZE]
+
+
+def _next_publication(kind, value, after):
+    entries = FeedEntry.objects.filter(pub_date__gt=after)
+    if kind == 'category':
+        entries = entries.filter(category=value)
+    elif kind == 'author':
+        entries = entries.filter(author=value)
+    return entries.order_by('pub_date').values_list(
+        'pub_date', flat=True).first()
+
+
+def _item(post):
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'link': reverse('blog:post_detail', args=(post.pk,)),
+        'text': post.text,
+        'author': post.author.username,
+        'category': post.category.title,
+        'pub_date': post.pub_date,
+        'updated_at': post.updated_at,
+    }
+
+
+def _revise(document, now=None):
+    """Новая ревизия документа: меняются ETag и Last-Modified ленты."""
+    document['revision'] = uuid.uuid4().hex
+    document['modified'] = now or timezone.now()
+
+
+def _merge(document, items, now=None):
+    """Вставляет элементы в документ, сохраняя порядок и размер."""
+    by_id = {item['id']: item for item in document['items']}
+    by_id.update((item['id'], item) for item in items)
+    merged = sorted(by_id.values(), key=_sort_key, reverse=True)
+    document['items'] = merged[:FEED_SIZE]
+    document['complete'] = (
+        document['complete'] and len(merged) <= FEED_SIZE)
+    _revise(document, now)
+
+
+def build_document(kind, value=''):
+    now = timezone.now()
+    items = [_item(post) for post in _visible_posts(kind, value, now)]
+    document = {
+        'items': items,
+        # Полный документ содержит все видимые посты ленты: из него
+        # можно удалять, не дочитывая замену из базы.
+        'complete': len(items) < FEED_SIZE,
+        'as_of': now,
+        'next_publication': _next_publication(kind, value, now),
+    }
+    _revise(document, now)
+    return document
+
+
+def get_document(kind, value=''):
+    """Документ ленты из кеша; собирается из базы только при промахе.
+
+    Отложенные посты видимыми становятся без сигнала, поэтому документ
+    помнит ближайшую публикацию и, когда она наступила, дочитывает
+    вышедшие с прошлого раза посты.
+    """
+    key = document_key(kind, value)
+    document = cache.get(key)
+    if document is None:
+        document = build_document(kind, value)
+        cache.set(key, document, DOCUMENT_TIMEOUT)
+        return document
+    now = timezone.now()
+    next_publication = document['next_publication']
+    if next_publication is not None and next_publication <= now:
+        _merge(document, [
+            _item(post) for post in _visible_posts(
+                kind, value, until=now, since=document['as_of'])
+        ], now)
+        document['as_of'] = now
+        document['next_publication'] = _next_publication(kind, value, now)
+        cache.set(key, document, DOCUMENT_TIMEOUT)
+    return document
+
+
+def refresh_post(post_id, category_ids=(), author_id=None):
+    """Обновляет закешированные документы, в которые входит пост.
+
+    Вызывается после сохранения или удаления поста. Если ни одного
+    документа в кеше нет, в базу не обращается.
+    """
+    feeds = [('site', '')]
+    feeds += [('category', pk) for pk in set(category_ids) if pk]
+    if author_id:
+        feeds.append(('author', author_id))
+    keys = {document_key(kind, value): (kind, value) for kind, value in feeds}
+    documents = cache.get_many(keys)
+    if not documents:
+        return
+    post = Post.objects.select_related(
+        'category', 'author', 'feed_entry',
+    ).filter(pk=post_id, feed_entry__isnull=False).first()
+    now = timezone.now()
+    for key, document in documents.items():
+        kind, value = keys[key]
+        action = _apply_post(document, post_id, post, kind, value, now)
+        if action == 'store':
+            cache.set(key, document, DOCUMENT_TIMEOUT)
+        elif action == 'delete':
+            cache.delete(key)
+
+
+def _apply_post(document, post_id, post, kind, value, now):
+    """Вносит пост в документ ленты `kind`/`value`.
+
+    `post` — None, если пост удалён или больше не виден. Возвращает
+    'store' (документ изменился), 'delete' (документ надо собрать
+    заново) или 'skip'.
+    """
+    items = [item for item in document['items'] if item['id'] != post_id]
+    removed = len(items) != len(document['items'])
+    document['items'] = items
+    post_item = None
+    scheduled = False
+    if post is not None and _belongs(kind, value, post):
+        pub_date = post.feed_entry.pub_date
+        if pub_date <= now:
+            post_item = _item(post)
+        elif (document['next_publication'] is None
+                or pub_date < document['next_publication']):
+            document['next_publication'] = pub_date
+            scheduled = True
+    if post_item is not None and (
+            document['complete'] or not items
+            or _sort_key(post_item) > _sort_key(items[-1])):
+        _merge(document, [post_item], now)
+    elif removed and not document['complete']:
+        # Пост ушёл за конец неполного документа: кем его заменить,
+        # знает только база — соберём документ заново при чтении.
+        return 'delete'
+    elif removed:
+        _revise(document, now)
+    elif not scheduled:
+        return 'skip'
+    return 'store'
+
+
+def _fingerprint(request, document, feed_format):
+    """Хеш XML ленты: ревизия документа, формат и адрес сайта."""
+    return hashlib.md5('|'.join((
+        document['revision'], feed_format, request.build_absolute_uri('/'),
+    )).encode()).hexdigest()
+
+
+def render(request, document, feed_format, **meta):
+    """XML ленты; кешируется по ревизии документа, формату и хосту."""
+    key = 'syndication-xml:' + _fingerprint(request, document, feed_format)
+    content = cache.get(key)
+    if content is None:
+        generator = FORMATS[feed_format](
+            language='ru',
+            feed_url=request.build_absolute_uri(),
+            **meta,
+        )
+        for item in document['items']:
+            link = request.build_absolute_uri(item['link'])
+            generator.add_item(
+                title=item['title'],
+                link=link,
+                description=item['text'],
+                unique_id=link,
+                author_name=item['author'],
+                pubdate=item['pub_date'],
+                updateddate=item['updated_at'],
+                categories=(item['category'],),
+            )
+        content = generator.writeString('utf-8')
+        cache.set(key, content, DOCUMENT_TIMEOUT)
+    return content
+
+
+def _request_document(request, kind, value=''):
+    if getattr(request, 'syndication_document', None) is None:
+        request.syndication_document = get_document(kind, value)
+    return request.syndication_document
+
+
+def _feed_etag(request, document, feed_format):
+    return '"%s"' % _fingerprint(request, document, feed_format)
+
+
+def _last_modified(document):
+    # Не самый свежий updated_at: удаление поста его не сдвигает.
+    return document['modified']
+
+
+def _feed_response(request, document, feed_format, **meta):
+    generator = FORMATS[feed_format]
+    return HttpResponse(
+        render(request, document, feed_format, **meta),
+        content_type=generator.content_type,
+    )
+
+
+def _check_format(feed_format):
+    if feed_format not in FORMATS:
+        raise Http404('Неизвестный формат ленты.')
+
+
+def get_request_category(request, category_slug):
+    if getattr(request, 'syndication_category', None) is None:
+        request.syndication_category = get_object_or_404(
+            Category, slug=category_slug, is_published=True)
+    return request.syndication_category
+
+
+def get_request_author(request, username):
+    if getattr(request, 'syndication_author', None) is None:
+        request.syndication_author = get_object_or_404(
+            User, username=username)
+    return request.syndication_author
+
+
+def _site_document(request, feed_format):
+    _check_format(feed_format)
+    return _request_document(request, 'site')
+
+
+def _category_document(request, category_slug, feed_format):
+    _check_format(feed_format)
+    category = get_request_category(request, category_slug)
+    return _request_document(request, 'category', category.pk)
+
+
+def _author_document(request, username, feed_format):
+    _check_format(feed_format)
+    author = get_request_author(request, username)
+    return _request_document(request, 'author', author.pk)
+
+
+def _validators(get_document):
+    """etag_func и last_modified_func для `condition` по документу ленты."""
+    def etag(request, **kwargs):
+        return _feed_etag(
+            request, get_document(request, **kwargs), kwargs['feed_format'])
+
+    def last_modified(request, **kwargs):
+        return _last_modified(get_document(request, **kwargs))
+
+    return {'etag_func': etag, 'last_modified_func': last_modified}
+
+
+@query_budget(4)
+@condition(**_validators(_site_document))
+def site_feed(request, feed_format):
+    return _feed_response(
+        request,
+        _site_document(request, feed_format),
+        feed_format,
+        title='Блогикум',
+        link=request.build_absolute_uri(reverse('blog:index')),
+        description='Новые публикации Блогикума.',
+    )
+
+
+@query_budget(5)
+@condition(**_validators(_category_document))
+def category_feed(request, category_slug, feed_format):
+    category = get_request_category(request, category_slug)
+    return _feed_response(
+        request,
+        _category_document(request, category_slug, feed_format),
+        feed_format,
+        title=f'Блогикум: {category.title}',
+        link=request.build_absolute_uri(
+            reverse('blog:category_posts', args=(category.slug,))),
+        description=category.description,
+    )
+
+
+@query_budget(5)
+@condition(**_validators(_author_document))
+def author_feed(request, username, feed_format):
+    author = get_request_author(request, username)
+    return _feed_response(
+        request,
+        _author_document(request, username, feed_format),
+        feed_format,
+        title=f'Блогикум: @{author.username}',
+        link=request.build_absolute_uri(
+            reverse('blog:profile', args=(author.username,))),
+        description=f'Публикации пользователя @{author.username}.',
+    )
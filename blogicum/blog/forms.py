@@ -2,6 +2,7 @@ from django import forms
 
 # Импортируем класс модели Birthday.
 from .models import Post, Comment
+from .export import FORMATS
 
 from django.contrib.auth import get_user_model
 from django.utils import timezone  # Для работы с часовыми поясами
@@ -33,4 +34,15 @@ class CommentForm(forms.ModelForm):
 class UserProfileForm(forms.ModelForm):
     class Meta:
         model = User
-        fields = ('first_name', 'last_name', 'username', 'email',)
\ No newline at end of file
+        fields = ('first_name', 'last_name', 'username', 'email',)
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[(name, name) for name in FORMATS],
+        required=False,
+    )
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+    category = forms.SlugField(required=False)
+    author = forms.CharField(required=False)
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_feeds
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Ширины производных изображений: миниатюра для ленты и средняя для
+# страницы поста. Больше оригинала не растягиваем.
+VARIANT_WIDTHS = {
+    'thumb': 320,
+    'medium': 800,
+}
+VARIANTS_DIR = 'post_image/variants'
+# (ключ в описании, формат Pillow, расширение, качество).
+FORMATS = (
+    ('jpeg', 'JPEG', 'jpg', 85),
+    ('webp', 'WEBP', 'webp', 80),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Общий пул потоков процесса для обработки изображений."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+                thread_name_prefix='post-images',
+            )
+        return _executor
+
+
+def variants_are_current(post):
+    return bool(post.image) and (
+        post.image_variants.get('source') == post.image.name
+    )
+
+
+def schedule_variants(post):
+    """Ставит генерацию производных в пул после фиксации транзакции.
+
+    При `IMAGE_WORKERS = 0` копии строятся сразу, в текущем потоке.
+    """
+    post_id, name = post.pk, post.image.name
+
+    def submit():
+        if getattr(settings, 'IMAGE_WORKERS', 2):
+            get_executor().submit(_process_in_worker, post_id, name)
+        else:
+            process_post_image(post_id, name)
+
+    transaction.on_commit(submit)
+
+
+def _process_in_worker(post_id, name):
+    # У потока пула своё подключение к БД: закрываем его за собой.
+    close_old_connections()
+    try:
+        return process_post_image(post_id, name)
+    finally:
+        close_old_connections()
+
+
+def process_post_image(post_id, name):
+    """Строит варианты и сохраняет их описание в посте.
+
+    Возвращает описание вариантов или None, если обработать файл
+    не удалось.
+    """
+    try:
+        variants = build_variants(name)
+        updated = Post.objects.filter(pk=post_id, image=name).update(
+            image_variants=variants,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            # Пока строились копии, картинку у поста сменили или пост
+            # удалили: копии уже никому не нужны.
+            delete_unused_image(name, variants)
+        else:
+            # Карточки кешируются по updated_at, а страницы лент — по
+            # версиям областей: сбрасываем и то, и другое.
+            slug, author_id = Post.objects.filter(pk=post_id).values_list(
+                'category__slug', 'author_id').first() or (None, None)
+            invalidate_feeds((slug,), authors=(author_id,))
+        return variants
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+        return None
+
+
+def build_variants(name):
+    """Сохраняет уменьшенные копии в JPEG и WebP и описывает их.
+
+    Возвращает словарь вида {'source': name, 'width': ..., 'sizes': [...]},
+    где каждый размер — {'name', 'width', 'jpeg', 'webp'}.
+    """
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    with storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    sizes = []
+    for variant, width in VARIANT_WIDTHS.items():
+        if width >= image.width:
+            continue
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        size = {'name': variant, 'width': width}
+        for key, fmt, ext, quality in FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, fmt, quality=quality)
+            size[key] = storage.save(
+                f'{VARIANTS_DIR}/{stem}_{width}.{ext}',
+                ContentFile(buffer.getvalue()),
+            )
+        sizes.append(size)
+    return {'source': name, 'width': image.width, 'sizes': sizes}
+
+
+def delete_unused_image(name, variants=None):
+    """Удаляет файл изображения и его копии, если он больше не нужен.
+
+    Хранилище адресует файлы по содержимому, и одну картинку могут
+    использовать несколько постов; копии при этом тоже общие.
+    """
+    if not name or Post.objects.filter(image=name).exists():
+        return False
+    storage = Post._meta.get_field('image').storage
+    names = [name] + [
+        size[key]
+        for size in (variants or {}).get('sizes', ())
+        for key, *_ in FORMATS
+    ]
+    for file_name in names:
+        storage.delete(file_name)
+    return True
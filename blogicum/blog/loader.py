@@ -0,0 +1,264 @@
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from . import sitemaps
+from .cache import invalidate_feeds, reset_publication_queue
+from .models import Category, FeedEntry, Post
+from .search import get_search_backend
+
+READ_CHUNK_SIZE = 1024 * 1024
+JSON_WHITESPACE = ' \t\r\n'
+
+
+def iter_fixture(stream, chunk_size=READ_CHUNK_SIZE):
+    """Объекты фикстуры по одному, без чтения файла целиком.
+
+    Понимает массив в формате `dumpdata` (`[{...}, {...}]`) и JSON Lines
+    (по объекту на строку); формат определяется по первому символу.
+    """
+    head = stream.read(chunk_size)
+    start = len(head) - len(head.lstrip(JSON_WHITESPACE))
+    if head[start:start + 1] == '[':
+        return _iter_array(stream, head, start + 1, chunk_size)
+    return _iter_lines(stream, head)
+
+
+def _iter_array(stream, buffer, pos, chunk_size):
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        # Пропускаем пробелы и запятые между элементами.
+        while True:
+            while pos < len(buffer) and buffer[pos] in JSON_WHITESPACE + ',':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            raise ValueError('Фикстура оборвана: нет закрывающей скобки.')
+        if buffer[pos] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Элемент не поместился в буфер — дочитываем и пробуем снова.
+            more = '' if eof else stream.read(chunk_size)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+
+
+def _iter_lines(stream, head):
+    tail = ''
+    for chunk in _chain_chunks(head, stream):
+        lines = (tail + chunk).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if tail.strip():
+        yield json.loads(tail)
+
+
+def _chain_chunks(head, stream):
+    yield head
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def dependency_order(models):
+    """Модели в таком порядке, чтобы ссылки шли только на уже загруженные.
+
+    Для блога это Category, Location, User, Post, Comment.
+    """
+    models = list(models)
+    ordered = []
+    visiting = set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if field.many_to_one and related in models and related != model:
+                visit(related)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create взял наши даты."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, *_ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def timestamp_fields(model):
+    """Поля модели с auto_now или auto_now_add."""
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+class BulkLoader:
+    """Загружает десериализованные объекты пачками через bulk_create.
+
+    Буферы ведутся по моделям; когда в них набирается `batch_size`
+    объектов, все буферы сбрасываются в порядке зависимостей, поэтому
+    память ограничена размером пачки, а внешние ключи указывают на уже
+    вставленные строки. Существующие первичные ключи обновляются через
+    bulk_update, как при `loaddata`. Сигналы не отправляются — производные
+    данные пересчитываются после загрузки (`rebuild_derived_data()`).
+    """
+
+    def __init__(self, batch_size=1000, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.buffers = defaultdict(list)
+        self.buffered = 0
+        self.counts = defaultdict(int)
+        self.order = []
+
+    def add(self, deserialized):
+        model = type(deserialized.object)
+        if model not in self.order:
+            self.order = dependency_order(self.order + [model])
+        self.buffers[model].append(deserialized)
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model in self.order:
+            batch = self.buffers.pop(model, None)
+            if batch:
+                self._save(model, batch)
+        self.buffered = 0
+
+    def _save(self, model, batch):
+        objects = [item.object for item in batch]
+        timestamps = timestamp_fields(model)
+        with explicit_timestamps(*timestamps):
+            self._save_objects(model, objects, timestamps)
+        self._save_m2m(batch)
+        self.counts[model._meta.label] += len(objects)
+
+    def _save_objects(self, model, objects, timestamps):
+        # Даты из фикстуры сохраняются как есть; отсутствующие получают
+        # момент загрузки, как при обычном сохранении.
+        now = timezone.now()
+        for obj in objects:
+            for field in timestamps:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+        manager = model._base_manager.using(self.using)
+        pks = [obj.pk for obj in objects if obj.pk is not None]
+        existing = set(
+            manager.filter(pk__in=pks).values_list('pk', flat=True)
+        ) if pks else set()
+        new = [obj for obj in objects if obj.pk not in existing]
+        old = [obj for obj in objects if obj.pk in existing]
+        if new:
+            manager.bulk_create(new, batch_size=self.batch_size)
+        if old:
+            fields = [
+                field for field in model._meta.concrete_fields
+                if not field.primary_key
+            ]
+            manager.bulk_update(
+                old, [field.name for field in fields],
+                batch_size=self.batch_size,
+            )
+
+    def _save_m2m(self, batch):
+        rows = defaultdict(list)
+        for item in batch:
+            for field_name, values in item.m2m_data.items():
+                rows[field_name].append((item.object.pk, values))
+        if not rows:
+            return
+        model = type(batch[0].object)
+        for field_name, pairs in rows.items():
+            field = model._meta.get_field(field_name)
+            through = field.remote_field.through
+            source = field.m2m_field_name() + '_id'
+            target = field.m2m_reverse_field_name() + '_id'
+            manager = through._base_manager.using(self.using)
+            manager.filter(**{
+                source + '__in': [pk for pk, _ in pairs],
+            }).delete()
+            manager.bulk_create(
+                [
+                    through(**{source: pk, target: value})
+                    for pk, values in pairs
+                    for value in values
+                ],
+                batch_size=self.batch_size,
+            )
+
+    def reset_sequences(self):
+        reset_sequences(self.order, self.using)
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """Сдвигает счётчики первичных ключей за вставленные явно id."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def load_fixture(stream, batch_size=1000, using=DEFAULT_DB_ALIAS):
+    """Загружает фикстуру из потока; возвращает число объектов по моделям."""
+    loader = BulkLoader(batch_size, using)
+    with transaction.atomic(using=using):
+        for deserialized in Deserializer(
+                iter_fixture(stream), using=using, ignorenonexistent=True):
+            loader.add(deserialized)
+        loader.flush()
+        loader.reset_sequences()
+    return dict(loader.counts)
+
+
+def rebuild_derived_data():
+    """Пересчитывает всё, что обычно поддерживают сигналы блога."""
+    with transaction.atomic():
+        Post.recount_comments()
+        FeedEntry.rebuild()
+        search = get_search_backend()
+        if search is not None:
+            search.rebuild()
+    reset_publication_queue()
+    sitemaps.invalidate_all()
+    invalidate_feeds(
+        Category.objects.values_list('slug', flat=True),
+        shared=True,
+    )
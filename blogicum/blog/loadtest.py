@@ -0,0 +1,127 @@
+import asyncio
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from .benchmark import percentile
+
+CHUNK_SIZE = 4096
+# Маленькое окно приёма — как у медленной мобильной сети: ответ
+# не помещается в буферы ядра, и сервер ждёт, пока клиент его дочитает.
+RECEIVE_BUFFER = 4096
+REQUEST_TIMEOUT = 60
+
+
+async def slow_request(host, port, path, send_delay, read_delay):
+    """Запрос медленного клиента: (статус, секунды).
+
+    Заголовки уходят по строке с паузой `send_delay`, ответ читается
+    кусками по CHUNK_SIZE с паузой `read_delay` через маленькое окно
+    приёма. Отправку запроса сервер почти не замечает (её принимают
+    буферы ядра), а вот запись ответа занимает его до конца чтения.
+    """
+    started = time.perf_counter()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    except OSError:
+        sock.close()
+        raise
+    reader, writer = await asyncio.open_connection(
+        sock=sock, limit=RECEIVE_BUFFER)
+    try:
+        lines = (
+            f'GET {path} HTTP/1.1',
+            f'Host: {host}:{port}',
+            'User-Agent: blogicum-loadtest',
+            'Connection: close',
+            '',
+        )
+        for line in lines:
+            writer.write(f'{line}\r\n'.encode())
+            await writer.drain()
+            await asyncio.sleep(send_delay)
+        status_line = await reader.readline()
+        while await reader.read(CHUNK_SIZE):
+            await asyncio.sleep(read_delay)
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, time.perf_counter() - started
+
+
+async def run_load(host, port, paths, clients, duration, send_delay,
+                   read_delay):
+    """`clients` медленных клиентов по кругу запрашивают `paths`
+    в течение `duration` секунд; возвращает сводку замера.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    latencies = []
+    errors = [0]
+
+    async def client(number):
+        while loop.time() < deadline:
+            path = paths[number % len(paths)]
+            number += 1
+            try:
+                status, elapsed = await asyncio.wait_for(
+                    slow_request(host, port, path, send_delay, read_delay),
+                    REQUEST_TIMEOUT,
+                )
+            except (OSError, asyncio.TimeoutError):
+                errors[0] += 1
+                continue
+            if status == 200:
+                latencies.append(elapsed * 1000)
+            else:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(clients)))
+    elapsed = time.perf_counter() - started
+    summary = {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 2),
+    }
+    for percent in (50, 90, 99):
+        summary[f'p{percent}_ms'] = round(
+            percentile(latencies, percent), 3) if latencies else None
+    return summary
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """WSGI-сервер с фиксированным числом рабочих потоков.
+
+    Так работает синхронный воркер с потоками (`gunicorn --threads`):
+    поток занят, пока клиент не отправит запрос и не заберёт ответ, и
+    медленные клиенты выстраиваются в очередь к потокам.
+    """
+
+    request_queue_size = 1024
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietHandler)
+        self.pool = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='wsgi')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_in_thread, request, client_address)
+
+    def process_in_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import importlib.util
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.benchmark import BenchmarkContext, save_results
+from blog.loadtest import ThreadPoolWSGIServer, run_load, slow_request
+
+STARTUP_TIMEOUT = 30
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI (фиксированный пул потоков) '
+        'и ASGI (uvicorn, асинхронные страницы чтения) под нагрузкой '
+        'многих медленных клиентов. Работает с текущей базой: заполните '
+        'её заранее командой generate_blog_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers', default=','.join(SERVERS),
+            help='Какие серверы замерять, через запятую: wsgi, asgi.')
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument(
+            '--duration', type=float, default=15,
+            help='Длительность замера одного сервера, секунд.')
+        parser.add_argument(
+            '--send-delay', type=float, default=0.05,
+            help='Пауза клиента между строками запроса, секунд.')
+        parser.add_argument(
+            '--read-delay', type=float, default=0.01,
+            help='Пауза клиента между кусками ответа, секунд.')
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоки WSGI-сервера и пул БД асинхронных представлений.')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--output', help='Куда записать результаты (JSON).')
+        # Внутренний режим: дочерний процесс с WSGI-сервером.
+        parser.add_argument(
+            '--serve', choices=('wsgi',), help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            return self.serve_wsgi(options)
+        servers = [name.strip() for name in options['servers'].split(',')]
+        unknown = set(servers) - set(SERVERS)
+        if unknown:
+            raise CommandError(f'Неизвестные серверы: {", ".join(unknown)}.')
+        if 'asgi' in servers and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError(
+                'Для замера ASGI нужен uvicorn: pip install uvicorn.')
+        try:
+            context = BenchmarkContext.from_database()
+        except ValueError as error:
+            raise CommandError(error)
+        paths = [
+            reverse('blog:index'),
+            reverse('blog:category_posts', args=(context.category.slug,)),
+            reverse('blog:post_detail', args=(context.post.pk,)),
+            reverse('blog:profile', args=(context.author.username,)),
+            reverse('pages:about'),
+        ]
+
+        results = {}
+        for name in servers:
+            process = self.start_server(name, options)
+            try:
+                results[name] = self.measure(paths, options)
+            finally:
+                process.terminate()
+                process.wait()
+            metrics = results[name]
+            self.stdout.write(
+                f'{name:<5} {metrics["rps"]:>8.1f} запр/с  '
+                f'p50 {metrics["p50_ms"] or 0:>9.1f} мс  '
+                f'p99 {metrics["p99_ms"] or 0:>9.1f} мс  '
+                f'ошибок {metrics["errors"]}'
+            )
+
+        if options['output']:
+            save_results(options['output'], results, {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                **{key: options[key] for key in (
+                    'clients', 'duration', 'send_delay', 'read_delay',
+                    'threads')},
+            })
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def start_server(self, name, options):
+        host, port = options['host'], str(options['port'])
+        env = {
+            **os.environ,
+            # Панель отладки — синхронное middleware: под ASGI она
+            # сводит обработку к одному потоку и портит сравнение.
+            'BLOGICUM_DEBUG': '0',
+            'BLOGICUM_ASYNC_DB_WORKERS': str(options['threads']),
+        }
+        if name == 'asgi':
+            command = [
+                sys.executable, '-m', 'uvicorn', 'blogicum.asgi:application',
+                '--host', host, '--port', port,
+                '--no-access-log', '--log-level', 'warning',
+            ]
+        else:
+            env['BLOGICUM_ASYNC_VIEWS'] = '0'
+            command = [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                'benchmark_servers', '--serve', 'wsgi',
+                '--host', host, '--port', port,
+                '--threads', str(options['threads']),
+            ]
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                socket.create_connection((host, int(port)), timeout=1).close()
+                return process
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    process.kill()
+                    raise CommandError(f'Сервер {name} не запустился.')
+                time.sleep(0.2)
+
+    def measure(self, paths, options):
+        host, port = options['host'], options['port']
+
+        async def warmup_and_load():
+            for path in paths:
+                status, _ = await slow_request(host, port, path, 0, 0)
+                if status != 200:
+                    raise CommandError(f'{path}: ответ {status}.')
+            return await run_load(
+                host, port, paths,
+                clients=options['clients'],
+                duration=options['duration'],
+                send_delay=options['send_delay'],
+                read_delay=options['read_delay'],
+            )
+        return asyncio.run(warmup_and_load())
+
+    def serve_wsgi(self, options):
+        server = ThreadPoolWSGIServer(
+            (options['host'], options['port']), options['threads'])
+        server.set_app(get_wsgi_application())
+        server.serve_forever()
@@ -0,0 +1,109 @@
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from blog.benchmark import (
+    DEFAULT_THRESHOLD,
+    BenchmarkRunner,
+    compare,
+    load_results,
+    save_results,
+)
+from blog.datagen import BlogDataGenerator
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число SQL-запросов и память представлений блога '
+        'на синтетических данных в тестовой базе и сравнивает с базовыми '
+        'результатами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--output', default='benchmark-results.json',
+            help='Куда записать результаты (JSON).')
+        parser.add_argument(
+            '--baseline', help='Базовые результаты для сравнения (JSON).')
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_THRESHOLD,
+            help='Допустимый рост задержки и памяти, во сколько раз.')
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результаты в --baseline вместо сравнения.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и переиспользовать данные.')
+
+    def handle(self, *args, **options):
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('Для --update-baseline нужен --baseline.')
+        results = self.run_benchmark(options)
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<20} p50 {metrics["p50_ms"]:>8.2f} мс  '
+                f'p90 {metrics["p90_ms"]:>8.2f} мс  '
+                f'p99 {metrics["p99_ms"]:>8.2f} мс  '
+                f'запросов {metrics["queries"]:>3}  '
+                f'память {metrics["peak_kib"]:>8.1f} КиБ'
+            )
+        meta = {
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'vendor': connection.vendor,
+            **{key: options[key] for key in (
+                'users', 'posts', 'comments', 'seed', 'iterations')},
+        }
+        save_results(options['output'], results, meta)
+
+        if options['update_baseline']:
+            save_results(options['baseline'], results, meta)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовые результаты обновлены: {options["baseline"]}'))
+            return
+        if options['baseline']:
+            regressions = compare(
+                results, load_results(options['baseline']),
+                options['threshold'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'))
+
+    def run_benchmark(self, options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(DEBUG=False):
+                if not Post.objects.exists():
+                    BlogDataGenerator(
+                        users=options['users'],
+                        posts=options['posts'],
+                        comments=options['comments'],
+                        seed=options['seed'],
+                    ).generate()
+                return BenchmarkRunner(
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                ).run()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
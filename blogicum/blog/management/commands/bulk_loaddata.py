@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.loader import load_fixture, rebuild_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает фикстуру (JSON-массив dumpdata или JSON Lines) '
+        'пачками через bulk_create и пересчитывает производные данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', help='Пути к фикстурам.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересчитывать ленту, счётчики и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for path in options['fixtures']:
+            try:
+                with open(path, encoding='utf-8') as stream:
+                    counts = load_fixture(stream, options['batch_size'])
+            except (OSError, ValueError) as error:
+                raise CommandError(f'{path}: {error}') from error
+            for label, count in sorted(counts.items()):
+                self.stdout.write(f'{label}: {count}')
+            total += sum(counts.values())
+        if not options['skip_rebuild']:
+            rebuild_derived_data()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total} '
+            f'за {time.monotonic() - started:.1f} с.'
+        ))
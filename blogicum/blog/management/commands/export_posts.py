@@ -0,0 +1,53 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import FORMATS, export_rows
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(
+            f'Неверная дата {value!r}, нужен формат ГГГГ-ММ-ДД.')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSON Lines или CSV, не загружая их в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', help='Файл для выгрузки (по умолчанию stdout).')
+        parser.add_argument('--since', help='Начальная дата публикации.')
+        parser.add_argument(
+            '--until', help='Конечная дата публикации (включительно).')
+        parser.add_argument('--category', help='Slug категории.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.exported = 0
+        rows = export_rows(
+            since=options['since'] and parse_date(options['since']),
+            until=options['until'] and parse_date(options['until']),
+            category=options['category'],
+            author=options['author'],
+            chunk_size=options['chunk_size'],
+        )
+        lines = FORMATS[options['format']][0](self.count(rows))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
+        self.stdout.write(
+            self.style.SUCCESS(f'Выгружено постов: {self.exported}.'))
+
+    def count(self, rows):
+        for row in rows:
+            self.exported += 1
+            yield row
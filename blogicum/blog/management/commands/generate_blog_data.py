@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.datagen import BlogDataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, категории, места, посты и '
+        'комментарии для нагрузочных замеров. Одинаковый --seed даёт '
+        'одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--locations', type=int, default=30)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней в прошлом распределить публикации.')
+        parser.add_argument('--future-ratio', type=float, default=0.05)
+        parser.add_argument('--unpublished-ratio', type=float, default=0.05)
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересчитывать ленту, счётчики и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not (options['users']
+                                     and options['categories']):
+            raise CommandError(
+                'Для постов нужен хотя бы один автор и одна категория.')
+        started = time.monotonic()
+        counts = BlogDataGenerator(
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            posts=options['posts'],
+            comments=options['comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            future_ratio=options['future_ratio'],
+            unpublished_ratio=options['unpublished_ratio'],
+        ).generate(rebuild=not options['skip_rebuild'])
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {summary} за {time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import process_post_image, variants_are_current
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии изображений постов, где их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии и для уже обработанных постов.',
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        posts = Post.objects.exclude(image='').only('image', 'image_variants')
+        for post in posts.iterator():
+            if options['force'] or not variants_are_current(post):
+                if process_post_image(post.pk, post.image.name) is not None:
+                    processed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {processed}.')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает витрину ленты (таблицу видимых публикаций).'
+
+    def handle(self, *args, **options):
+        created = FeedEntry.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'В ленте публикаций: {created}.')
+        )
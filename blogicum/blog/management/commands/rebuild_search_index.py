@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError('Поиск не поддерживается для этой СУБД.')
+        indexed = backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано записей: {indexed}.')
+        )
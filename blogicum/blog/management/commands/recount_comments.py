@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев у публикаций.'
+
+    def handle(self, *args, **options):
+        updated = Post.recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}.')
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.scheduler import PublicationScheduler
+from core.cache import cache_is_shared
+
+
+class Command(BaseCommand):
+    help = (
+        'Выпускает отложенные публикации: сбрасывает и прогревает кеш лент '
+        'в момент наступления pub_date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать вышедшие публикации и завершиться (для cron).',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=int,
+            default=60,
+            help='Максимальная пауза между проверками, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError(
+                'Кеш этого процесса не виден веб-процессам: настройте общий '
+                'бэкенд CACHES или включите '
+                'PUBLICATION_SCHEDULER_IN_PROCESS.'
+            )
+        scheduler = PublicationScheduler(options['poll_interval'])
+        if options['once']:
+            slugs = scheduler.run_pending()
+            self.stdout.write(
+                'Обновлены ленты категорий: '
+                f'{", ".join(sorted(slugs)) or "-"}.'
+            )
+            return
+        self.stdout.write('Планировщик публикаций запущен.')
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
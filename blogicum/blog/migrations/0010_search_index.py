@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import migrations
+
+# Таблица индекса управляется вручную: у FTS5 и tsvector нет аналога
+# среди полей моделей. Строки пересчитываются из blog_post и
+# blog_comment, поэтому индекс можно в любой момент пересобрать
+# командой rebuild_search_index.
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE blog_search USING fts5('
+    'title, body, post_id UNINDEXED, '
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO blog_search(blog_search, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    'INSERT INTO blog_search(rowid, title, body, post_id) '
+    'SELECT id * 2, title, text, id FROM blog_post',
+    'INSERT INTO blog_search(rowid, title, body, post_id) '
+    "SELECT id * 2 + 1, '', text, post_id FROM blog_comment",
+]
+
+POSTGRESQL_FORWARD = [
+    'CREATE TABLE blog_search ('
+    'rowid bigint PRIMARY KEY, '
+    'post_id bigint NOT NULL, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX blog_search_document_idx '
+    'ON blog_search USING GIN (document)',
+    'CREATE INDEX blog_search_post_idx ON blog_search (post_id)',
+    'INSERT INTO blog_search (rowid, post_id, document) '
+    "SELECT id * 2, id, setweight(to_tsvector(%(config)s, title), 'A') "
+    "|| setweight(to_tsvector(%(config)s, text), 'D') FROM blog_post",
+    'INSERT INTO blog_search (rowid, post_id, document) '
+    "SELECT id * 2 + 1, post_id, setweight(to_tsvector(%(config)s, text), 'D') "
+    'FROM blog_comment',
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements, params = SQLITE_FORWARD, None
+    elif vendor == 'postgresql':
+        statements = POSTGRESQL_FORWARD
+        params = {'config': getattr(settings, 'SEARCH_CONFIG', 'russian')}
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql, params)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS blog_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_feed_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,13 +1,19 @@
-from django.db import models
+from contextvars import ContextVar
+
+from django.db import models, transaction
 
 from core.models import BaseModel
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 User = get_user_model()
 
+# id постов, которые сейчас удаляются через Post.delete().
+_deleting_posts = ContextVar('deleting_posts', default=frozenset())
+
 # Create your models here.
 
 
@@ -73,20 +79,74 @@ class Post(BaseModel):
     image = models.ImageField(blank=True,
                               upload_to='post_image',
                               verbose_name='Изображение')
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
 
     class Meta:
         verbose_name = 'публикация'
-        verbose_name_plural = 'Публикации' 
+        verbose_name_plural = 'Публикации'
+        indexes = (
+            # Лента: is_published=True ... ORDER BY pub_date DESC, id DESC.
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            # Профиль: author_id = ... ORDER BY pub_date DESC.
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title 
     
+    def delete(self, *args, **kwargs):
+        token = _deleting_posts.set(_deleting_posts.get() | {self.pk})
+        try:
+            return super().delete(*args, **kwargs)
+        finally:
+            _deleting_posts.reset(token)
+
+    @staticmethod
+    def is_being_deleted(post_id):
+        """Удаляется ли пост прямо сейчас вместе со своими комментариями.
+
+        Обработчики сигналов комментариев пропускают работу, которую
+        удаление поста всё равно сделает один раз за весь пост.
+        """
+        return post_id in _deleting_posts.get()
+
     @classmethod
-    def with_comments_count(cls, queryset=None):
-       """Вычисляет количество комментов для каждого поста и добавляет это как поле `comments_count`."""
-       if queryset is None:
-          queryset = cls.objects.all()
-       return queryset.annotate(comment_count = Count('comments'))
+    def recount_comments(cls, queryset=None):
+        """Пересчитывает сохранённое поле `comment_count` одним UPDATE."""
+        if queryset is None:
+            queryset = cls.objects.all()
+        comments = Comment.objects.filter(
+            post=OuterRef('pk'),
+        ).order_by().values('post').annotate(total=Count('pk')).values('total')
+        return queryset.update(
+            comment_count=Coalesce(Subquery(comments), 0),
+        )
 
 
 class Comment(BaseModel):
@@ -102,5 +162,115 @@ class Comment(BaseModel):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
 
     class Meta:
-        ordering = ('created_at',) 
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
+
+
+class FeedEntry(models.Model):
+    """Витрина ленты: по строке на каждую видимую публикацию.
+
+    Строка есть, если публикация и её категория опубликованы. Дата
+    публикации хранится здесь же, поэтому отложенные посты попадают в
+    ленту без пересчёта: условие `pub_date <= now` — это просто диапазон
+    по индексу. Таблицу поддерживают сигналы, а команда `rebuild_feed`
+    пересобирает её целиком.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+    )
+    pub_date = models.DateTimeField()
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-post'),
+                name='feed_entry_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-post'),
+                name='feed_entry_category_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-post'),
+                name='feed_entry_author_idx',
+            ),
+        )
 
+    @staticmethod
+    def is_visible(post):
+        return bool(
+            post.is_published
+            and post.category_id
+            and post.category.is_published
+        )
+
+    @classmethod
+    def sync(cls, post):
+        """Добавляет, обновляет или убирает строку одной публикации."""
+        if cls.is_visible(post):
+            cls.objects.update_or_create(post_id=post.pk, defaults={
+                'pub_date': post.pub_date,
+                'category_id': post.category_id,
+                'author_id': post.author_id,
+            })
+        else:
+            cls.objects.filter(post_id=post.pk).delete()
+
+    @classmethod
+    def sync_category(cls, category):
+        """Приводит витрину в соответствие с публикацией категории."""
+        if not category.is_published:
+            cls.objects.filter(category=category).delete()
+        else:
+            cls.fill(Post.objects.filter(category=category))
+
+    @classmethod
+    def fill(cls, posts, batch_size=1000):
+        """Вставляет недостающие строки для видимых публикаций из `posts`."""
+        rows = posts.filter(
+            is_published=True,
+            category__is_published=True,
+            feed_entry__isnull=True,
+        ).values_list('pk', 'pub_date', 'category_id', 'author_id')
+        batch = []
+        for post_id, pub_date, category_id, author_id in rows.iterator(
+                chunk_size=batch_size):
+            batch.append(cls(
+                post_id=post_id,
+                pub_date=pub_date,
+                category_id=category_id,
+                author_id=author_id,
+            ))
+            if len(batch) >= batch_size:
+                cls.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        cls.objects.bulk_create(batch, ignore_conflicts=True)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls):
+        """Собирает витрину заново; возвращает число строк в ней."""
+        cls.objects.all().delete()
+        cls.fill(Post.objects.all())
+        return cls.objects.count()
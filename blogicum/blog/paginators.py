@@ -0,0 +1,183 @@
+import base64
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage(Sequence):
+    """Страница seek-пагинации.
+
+    Повторяет интерфейс `django.core.paginator.Page`, который нужен
+    шаблонам: итерацию, `has_next`, `has_previous` и `has_other_pages`.
+    Вместо номеров страниц наружу отдаются курсоры.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage: {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Страница выбирается условием вида
+    `(pub_date, id) < (последняя дата, последний id)` и `LIMIT`,
+    поэтому N-я страница стоит столько же, сколько первая, а `COUNT(*)`
+    не выполняется вовсе. Последнее поле в `ordering` должно быть
+    уникальным (обычно это `pk`).
+
+    `object_list` может быть как обычным queryset, так и результатом
+    `.values()`. Если передан `resolve`, он вызывается для строк страницы
+    и должен вернуть объекты для шаблона в том же порядке.
+    """
+
+    is_keyset = True
+    FIRST = 'first'
+    LAST = 'last'
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk'),
+                 cursor_param='cursor', resolve=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.cursor_param = cursor_param
+        self.resolve = resolve
+        self._fields = [name.lstrip('-') for name in self.ordering]
+        self._descending = [name.startswith('-') for name in self.ordering]
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу по курсору; битый курсор — первая страница."""
+        if cursor == self.LAST:
+            return self._page_from_end()
+        try:
+            direction, values = self.decode_cursor(cursor)
+        except (TypeError, ValueError):
+            direction, values = None, None
+
+        if direction == 'before':
+            return self._page_before(values)
+        return self._page_after(values)
+
+    def _page_after(self, values):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse=False))
+        rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._make_page(
+            rows,
+            has_next=has_next,
+            has_previous=values is not None and bool(rows),
+        )
+
+    def _page_before(self, values):
+        rows = list(
+            self.object_list.filter(self._seek(values, reverse=True))
+            .order_by(*self._reversed_ordering())[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._make_page(rows, has_next=bool(rows),
+                               has_previous=has_previous)
+
+    def _page_from_end(self):
+        rows = list(
+            self.object_list.order_by(*self._reversed_ordering())
+            [:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._make_page(rows, has_next=False,
+                               has_previous=has_previous)
+
+    def _make_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('after', rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('before', rows[0])
+        objects = self.resolve(rows) if self.resolve else rows
+        return KeysetPage(objects, self, next_cursor, previous_cursor)
+
+    def _reversed_ordering(self):
+        return tuple(
+            name if descending else f'-{name}'
+            for name, descending in zip(self._fields, self._descending)
+        )
+
+    def _seek(self, values, reverse):
+        """Строит условие «строго после» (или «строго до») набора ключей."""
+        condition = Q()
+        for index, (name, descending) in enumerate(
+                zip(self._fields, self._descending)):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_name, prev_value in zip(self._fields, values[:index]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def _row_value(self, row, name):
+        if isinstance(row, dict):
+            if name == 'pk' and name not in row:
+                name = self.object_list.model._meta.pk.attname
+            return row[name]
+        return getattr(row, name)
+
+    def encode_cursor(self, direction, row):
+        payload = [direction] + [
+            self._row_value(row, name) for name in self._fields
+        ]
+        # str() сохраняет микросекунды у дат, в отличие от DjangoJSONEncoder.
+        raw = json.dumps(payload, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor or cursor == self.FIRST:
+            return None, None
+        padding = '=' * (-len(cursor) % 4)
+        try:
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            payload = json.loads(raw)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Некорректный курсор.')
+        if (not isinstance(payload, list)
+                or len(payload) != len(self._fields) + 1
+                or payload[0] not in ('after', 'before')):
+            raise ValueError('Некорректный курсор.')
+        model = self.object_list.model
+        values = []
+        for name, value in zip(self._fields, payload[1:]):
+            field = (model._meta.pk if name == 'pk'
+                     else model._meta.get_field(name))
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise ValueError('Некорректный курсор.')
+        return payload[0], values
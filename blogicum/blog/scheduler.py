@@ -0,0 +1,130 @@
+import logging
+import threading
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpRequest
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .cache import (
+    invalidate_feeds,
+    next_publication_time,
+    reset_publication_queue,
+)
+from .models import FeedEntry
+
+logger = logging.getLogger(__name__)
+
+LAST_RUN_KEY = 'publication-scheduler:last-run'
+# Страницы прогреваются синхронными представлениями: ключи кеша у них
+# те же, что у асинхронных версий из blogicum.asgi_urls.
+WARM_URLCONF = 'blogicum.urls'
+
+
+class PublicationScheduler:
+    """Выпускает отложенные публикации в ленты.
+
+    Публикация с будущей `pub_date` уже лежит в витрине ленты и
+    становится видимой, как только наступает её время. Планировщик
+    просыпается к этому моменту, сбрасывает кеш затронутых лент
+    (главной и категорий) и сразу прогревает их первые страницы, чтобы
+    первый посетитель не платил за рендер.
+
+    Запускается в потоке веб-процесса (`start()`, см. настройку
+    PUBLICATION_SCHEDULER_IN_PROCESS) или командой
+    `run_publication_scheduler`, если кеш общий для процессов.
+    """
+
+    def __init__(self, poll_interval=60):
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def run_pending(self, now=None):
+        """Обрабатывает публикации, вышедшие с прошлого запуска."""
+        now = now or timezone.now()
+        last_run = cache.get(LAST_RUN_KEY) or now
+        released = set(
+            FeedEntry.objects.filter(
+                pub_date__gt=last_run,
+                pub_date__lte=now,
+            ).values_list('category__slug', 'author_id').distinct()
+        )
+        cache.set(LAST_RUN_KEY, now, timeout=None)
+        if not released:
+            return set()
+        slugs = {slug for slug, _ in released}
+        logger.info('Вышли отложенные публикации в категориях: %s',
+                    ', '.join(sorted(slugs)))
+        # Профили авторов тоже показывают ленту: их валидаторы сдвигаем.
+        invalidate_feeds(slugs, authors={author for _, author in released})
+        reset_publication_queue()
+        self.warm(slugs)
+        return slugs
+
+    def warm(self, category_slugs=()):
+        """Рендерит первые страницы лент для анонимного посетителя."""
+        urls = [reverse('blog:index', urlconf=WARM_URLCONF)] + [
+            reverse('blog:category_posts', args=(slug,),
+                    urlconf=WARM_URLCONF)
+            for slug in category_slugs
+        ]
+        for url in urls:
+            match = resolve(url, urlconf=WARM_URLCONF)
+            request = HttpRequest()
+            request.method = 'GET'
+            request.path = request.path_info = url
+            request.resolver_match = match
+            request.user = AnonymousUser()
+            try:
+                match.func(request, *match.args, **match.kwargs)
+            except Exception:
+                logger.exception('Не удалось прогреть кеш %s', url)
+
+    def seconds_to_sleep(self):
+        next_pub_date = next_publication_time()
+        if next_pub_date is None:
+            return self.poll_interval
+        delay = (next_pub_date - timezone.now()).total_seconds()
+        return max(0, min(self.poll_interval, delay))
+
+    def wake(self):
+        """Будит планировщик, например после появления новой публикации."""
+        self._wakeup.set()
+
+    def run_forever(self):
+        while not self._stopped.is_set():
+            close_old_connections()
+            try:
+                self.run_pending()
+                delay = self.seconds_to_sleep()
+            except Exception:
+                logger.exception('Ошибка планировщика публикаций')
+                delay = self.poll_interval
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+        close_old_connections()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self.run_forever,
+                name='publication-scheduler',
+                daemon=True,
+            )
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# Общий экземпляр процесса: сигналы будят его при изменении очереди.
+scheduler = PublicationScheduler()
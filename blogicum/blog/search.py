@@ -0,0 +1,301 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .models import Comment, FeedEntry, Post
+
+SEARCH_TABLE = 'blog_search'
+MAX_QUERY_LENGTH = 200
+
+
+# Годятся и для чисел, и для выражений F(): из них же собираются
+# запросы, которые считают rowid на стороне СУБД.
+def post_rowid(post_id):
+    return post_id * 2
+
+
+def comment_rowid(comment_id):
+    return comment_id * 2 + 1
+
+
+def compile_queryset(queryset):
+    """SQL и параметры queryset для вставки в сырой запрос."""
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+def index_documents():
+    """Строки индекса для постов и для комментариев, два queryset.
+
+    Колонки: doc_rowid, doc_post_id, doc_title, doc_body.
+    """
+    return (
+        Post.objects.order_by().values(
+            doc_rowid=post_rowid(F('pk')),
+            doc_post_id=F('pk'),
+            doc_title=F('title'),
+            doc_body=F('text'),
+        ),
+        Comment.objects.order_by().values(
+            doc_rowid=comment_rowid(F('pk')),
+            doc_post_id=F('post_id'),
+            doc_title=Value(''),
+            doc_body=F('text'),
+        ),
+    )
+
+
+class SearchResults:
+    """Результаты поиска, которые понимает `django.core.paginator.Paginator`.
+
+    Хранит только запрос: `count()` и срез выполняют по одному запросу
+    к индексу, а публикации для страницы загружаются одним `in_bulk`.
+    """
+
+    def __init__(self, backend, query, visible_only=True):
+        self.backend = backend
+        self.query = query
+        self.visible_only = visible_only
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query, self.visible_only)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def ids(self, limit, offset=0):
+        return self.backend.search_ids(
+            self.query, limit, offset, self.visible_only)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        ids = self.ids(index.stop - offset, offset)
+        posts = Post.objects.select_related(
+            'category',
+            'location',
+            'author',
+        ).in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class BaseSearchBackend:
+    """Общий интерфейс полнотекстового поиска по постам и комментариям.
+
+    В индексе по строке на пост (заголовок и текст) и на комментарий
+    (только текст); `rowid` строки — `post_rowid()`/`comment_rowid()`.
+    Результат поиска — id постов, отсортированные по релевантности
+    лучшей найденной строки. Таблицу индекса создаёт миграция
+    `0010_search_index`.
+    """
+
+    rank_order = 'rank'
+
+    upsert_sql = None
+    # INSERT ... SELECT для rebuild(): {documents} — подзапрос из
+    # `index_documents()`.
+    fill_sql = None
+
+    def upsert_params(self, rowid, post_id, title, body):
+        raise NotImplementedError
+
+    def upsert(self, rowid, post_id, title, body):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.upsert_sql,
+                self.upsert_params(rowid, post_id, title, body),
+            )
+
+    def delete(self, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def matches(self, query, visible_only):
+        """Возвращает (SQL с колонками post_id и rank, параметры)."""
+        raise NotImplementedError
+
+    def index_post(self, post):
+        self.upsert(post_rowid(post.pk), post.pk, post.title, post.text)
+
+    def remove_post(self, post_id):
+        self.delete(post_rowid(post_id))
+
+    def remove_post_comments(self, post_id):
+        """Убирает из индекса все комментарии поста одним запросом."""
+        sql, params = compile_queryset(
+            Comment.objects.filter(post_id=post_id).order_by().values(
+                doc_rowid=comment_rowid(F('pk'))))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({sql})', params)
+
+    def index_comment(self, comment):
+        self.upsert(comment_rowid(comment.pk), comment.post_id, '',
+                    comment.text)
+
+    def remove_comment(self, comment_id):
+        self.delete(comment_rowid(comment_id))
+
+    @transaction.atomic
+    def rebuild(self):
+        """Пересобирает индекс целиком на стороне СУБД, без выборки строк."""
+        self.clear()
+        indexed = 0
+        with connection.cursor() as cursor:
+            for documents in index_documents():
+                sql, params = compile_queryset(documents)
+                cursor.execute(
+                    self.fill_sql.format(documents=sql),
+                    self.fill_params() + list(params),
+                )
+                indexed += cursor.rowcount
+        return indexed
+
+    def fill_params(self):
+        return []
+
+    def search(self, query, visible_only=True):
+        return SearchResults(self, query, visible_only)
+
+    def _visibility(self, visible_only):
+        if not visible_only:
+            return '', []
+        return (
+            f' JOIN {FeedEntry._meta.db_table} f ON f.post_id = m.post_id'
+            ' WHERE f.pub_date <= %s',
+            [timezone.now()],
+        )
+
+    def search_ids(self, query, limit, offset=0, visible_only=True):
+        sql, params = self.matches(query, visible_only)
+        if sql is None:
+            return []
+        join, join_params = self._visibility(visible_only)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT m.post_id FROM ({sql}) m{join}'
+                f' ORDER BY m.{self.rank_order}, m.post_id DESC'
+                ' LIMIT %s OFFSET %s',
+                params + join_params + [limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, query, visible_only=True):
+        sql, params = self.matches(query, visible_only)
+        if sql is None:
+            return 0
+        join, join_params = self._visibility(visible_only)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM ({sql}) m{join}',
+                params + join_params,
+            )
+            return cursor.fetchone()[0]
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5: виртуальная таблица с ранжированием bm25.
+
+    Веса bm25 (заголовок в 10 раз важнее текста) заданы в конфигурации
+    таблицы, поэтому в запросе используется скрытая колонка `rank`.
+    """
+
+    upsert_sql = (
+        f'INSERT OR REPLACE INTO {SEARCH_TABLE}'
+        '(rowid, title, body, post_id) VALUES (%s, %s, %s, %s)'
+    )
+
+    fill_sql = (
+        f'INSERT INTO {SEARCH_TABLE}(rowid, title, body, post_id) '
+        'SELECT doc_rowid, doc_title, doc_body, doc_post_id '
+        'FROM ({documents}) documents'
+    )
+
+    def upsert_params(self, rowid, post_id, title, body):
+        return [rowid, title, body, post_id]
+
+    @staticmethod
+    def to_match(query):
+        # Каждое слово — отдельная фраза с поиском по префиксу, поэтому
+        # кавычки и операторы FTS5 из запроса пользователя не работают.
+        words = re.findall(r'\w+', query[:MAX_QUERY_LENGTH])
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def matches(self, query, visible_only):
+        match = self.to_match(query)
+        if not match:
+            return None, []
+        return (
+            f'SELECT post_id, MIN(rank) AS rank FROM ('
+            f'SELECT post_id, rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s) GROUP BY post_id',
+            [match],
+        )
+
+
+class PostgreSQLSearchBackend(BaseSearchBackend):
+    """tsvector с GIN-индексом и ранжированием ts_rank."""
+
+    rank_order = 'rank DESC'
+
+    @property
+    def config(self):
+        return getattr(settings, 'SEARCH_CONFIG', 'russian')
+
+    upsert_sql = (
+        f'INSERT INTO {SEARCH_TABLE} (rowid, post_id, document) '
+        "VALUES (%s, %s, setweight(to_tsvector(%s, %s), 'A') "
+        "|| setweight(to_tsvector(%s, %s), 'D')) "
+        'ON CONFLICT (rowid) DO UPDATE SET document = EXCLUDED.document'
+    )
+
+    fill_sql = (
+        f'INSERT INTO {SEARCH_TABLE} (rowid, post_id, document) '
+        'SELECT doc_rowid, doc_post_id, '
+        "setweight(to_tsvector(%s, doc_title), 'A') "
+        "|| setweight(to_tsvector(%s, doc_body), 'D') "
+        'FROM ({documents}) documents'
+    )
+
+    def upsert_params(self, rowid, post_id, title, body):
+        return [rowid, post_id, self.config, title, self.config, body]
+
+    def fill_params(self):
+        return [self.config, self.config]
+
+    def matches(self, query, visible_only):
+        query = query[:MAX_QUERY_LENGTH].strip()
+        if not query:
+            return None, []
+        return (
+            'SELECT s.post_id, MAX(ts_rank(s.document, q)) AS rank '
+            f'FROM {SEARCH_TABLE} s, websearch_to_tsquery(%s, %s) q '
+            'WHERE s.document @@ q GROUP BY s.post_id',
+            [self.config, query],
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend(using=None):
+    """Бэкенд поиска для СУБД текущего подключения.
+
+    Для остальных СУБД индекс не создаётся и возвращается None.
+    """
+    backend_class = BACKENDS.get((using or connection).vendor)
+    return backend_class() if backend_class else None
@@ -0,0 +1,316 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import feeds, sitemaps
+from .cache import invalidate_feeds, reset_publication_queue
+from .images import (
+    delete_unused_image,
+    schedule_variants,
+    variants_are_current,
+)
+from .models import Category, Comment, FeedEntry, Location, Post
+from .scheduler import scheduler
+from .search import get_search_backend
+
+User = get_user_model()
+
+
+def touch_posts(**filters):
+    """Сдвигает `updated_at` у публикаций.
+
+    Кеш карточек поста привязан к `updated_at`, поэтому после этого
+    закешированные карточки перестают совпадать по ключу.
+    """
+    return Post.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+def category_slugs(*ids):
+    ids = {pk for pk in ids if pk is not None}
+    if not ids:
+        return []
+    return list(
+        Category.objects.filter(pk__in=ids).values_list('slug', flat=True)
+    )
+
+
+@receiver(pre_save, sender=Post)
+def fill_raw_updated_at(sender, instance, raw=False, **kwargs):
+    # loaddata сохраняет в raw-режиме, где auto_now не срабатывает.
+    if raw and instance.updated_at is None:
+        instance.updated_at = instance.created_at or timezone.now()
+
+
+@receiver(pre_save, sender=Post)
+def reset_stale_image_variants(sender, instance, **kwargs):
+    # Варианты старой картинки не должны попасть в шаблон новой.
+    if instance.image_variants and not variants_are_current(instance):
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=Post)
+def delete_replaced_image(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous[0] and previous[0] != instance.image.name:
+        transaction.on_commit(lambda: delete_unused_image(*previous))
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_image(sender, instance, **kwargs):
+    name, variants = instance.image.name, instance.image_variants
+    if name:
+        transaction.on_commit(lambda: delete_unused_image(name, variants))
+
+
+@receiver(post_save, sender=Post)
+def generate_image_variants(sender, instance, **kwargs):
+    if instance.image and not variants_are_current(instance):
+        schedule_variants(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_category(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние категорию и картинку.
+
+    Категория нужна, чтобы сбросить и её ленту, картинка — чтобы удалить
+    файл, на который больше никто не ссылается.
+    """
+    instance._previous_category_id = None
+    instance._previous_image = None
+    if instance.pk and not raw:
+        previous = Post.objects.filter(pk=instance.pk).values(
+            'category_id', 'image', 'image_variants',
+        ).first()
+        if previous:
+            instance._previous_category_id = previous['category_id']
+            instance._previous_image = (
+                previous['image'], previous['image_variants'])
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed_entry(sender, instance, **kwargs):
+    # Срабатывает и при loaddata: если категории ещё нет, строку добавит
+    # sync_category_feed_entries, когда категория будет загружена.
+    FeedEntry.sync(instance)
+    reset_publication_queue()
+    scheduler.wake()
+
+
+@receiver(post_save, sender=Category)
+def sync_category_feed_entries(sender, instance, **kwargs):
+    FeedEntry.sync_category(instance)
+    reset_publication_queue()
+    scheduler.wake()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_feeds(
+        category_slugs(
+            instance.category_id,
+            getattr(instance, '_previous_category_id', None),
+        ),
+        authors=(instance.author_id,),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def refresh_syndication_feeds(sender, instance, raw=False, **kwargs):
+    # После sync_post_feed_entry: видимость берётся из витрины.
+    if raw:
+        return
+    feeds.refresh_post(
+        instance.pk,
+        (instance.category_id,
+         getattr(instance, '_previous_category_id', None)),
+        instance.author_id,
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_syndication_feeds(sender, instance, raw=False, **kwargs):
+    # Название категории есть в каждом элементе ленты.
+    if not raw:
+        feeds.invalidate_documents()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_sitemaps(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sitemaps.invalidate(
+        posts=(instance.pk,),
+        profiles=(instance.author_id,),
+        categories=(
+            instance.category_id,
+            getattr(instance, '_previous_category_id', None),
+        ),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_sitemap(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sitemaps.invalidate(categories=(instance.pk,))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_posts_sitemaps(sender, instance, raw=False, **kwargs):
+    # Категория определяет видимость своих постов, а с ними и профилей
+    # авторов. Удаление — в pre_delete, пока у постов есть category_id.
+    if not raw:
+        sitemaps.invalidate_posts(category_id=instance.pk)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._previous_slug = Category.objects.filter(
+            pk=instance.pk,
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, instance, raw=False, **kwargs):
+    # Категория видна и в профилях авторов её постов: её видимость
+    # и название меняют все ленты, поэтому сбрасываем общую область.
+    if not raw:
+        invalidate_feeds(
+            (instance.slug, getattr(instance, '_previous_slug', None)),
+            shared=True,
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, raw=False, **kwargs):
+    # В ленте виден только счётчик: правка текста ленту не меняет.
+    if raw or kwargs.get('created') is False:
+        return
+    if Post.is_being_deleted(instance.post_id):
+        # Удаление поста само сбросит ленты один раз.
+        return
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'category__slug', 'author_id').first()
+    if post:
+        invalidate_feeds(
+            (post['category__slug'],), authors=(post['author_id'],))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_feeds(index=False, shared=True)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Новый комментарий увеличивает счётчик поста атомарным UPDATE."""
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance, created, raw=False, **kwargs):
+    # Правка текста меняет страницу поста: сдвигаем её валидатор.
+    if not created and not raw:
+        touch_posts(pk=instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Срабатывает и для удаления из админки, и для queryset.delete()."""
+    if Post.is_being_deleted(instance.post_id):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_posts(sender, instance, raw=False, **kwargs):
+    # Удаление обрабатываем в pre_delete: после него у постов уже
+    # category_id = NULL (on_delete=SET_NULL) и найти их нельзя.
+    if not raw:
+        touch_posts(category_id=instance.pk)
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def touch_location_posts(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_posts(location_id=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, created, raw=False,
+                       update_fields=None, **kwargs):
+    # Вход в систему сохраняет только last_login — страницы не меняются.
+    if created or raw:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_feeds(index=False, authors=(instance.pk,))
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    sitemaps.invalidate(profiles=(instance.pk,))
+    if touch_posts(author_id=instance.pk):
+        invalidate_feeds(index=False, shared=True)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance, **kwargs):
+    # Индекс — производные данные, поэтому обновляем его и при loaddata.
+    backend = get_search_backend()
+    if backend is None:
+        return
+    if sender is Post:
+        backend.index_post(instance)
+    else:
+        backend.index_comment(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def remove_comments_from_search(sender, instance, **kwargs):
+    # Комментарии поста убираются из индекса одним запросом, пока они
+    # ещё в базе; иначе каскад стоил бы по запросу на комментарий.
+    backend = get_search_backend()
+    if backend is not None:
+        backend.remove_post_comments(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def remove_from_search(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is None:
+        return
+    if sender is Post:
+        backend.remove_post(instance.pk)
+    elif not Post.is_being_deleted(instance.post_id):
+        backend.remove_comment(instance.pk)
@@ -0,0 +1,286 @@
+import glob
+import hashlib
+import math
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import F, Max, OuterRef, Subquery
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache import bump_versions, cache_is_shared, get_versions
+from core.queries import query_budget
+
+from .models import Category, FeedEntry, Post, User
+
+# Протокол допускает до 50 000 адресов в одном файле.
+SHARD_SIZE = 50000
+BATCH_SIZE = 2000
+SITEMAP_SCOPE = 'sitemap'
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def shard_of(pk):
+    return (pk - 1) // SHARD_SIZE
+
+
+def shard_scope(section, shard):
+    return f'{SITEMAP_SCOPE}:{section}:{shard}'
+
+
+def invalidate(**ids):
+    """Сбрасывает шарды, в диапазоны которых попадают id объектов.
+
+    Например, `invalidate(posts=[post.pk], profiles=[post.author_id])`.
+    """
+    scopes = {
+        shard_scope(section, shard_of(pk))
+        for section, pks in ids.items()
+        for pk in pks if pk
+    }
+    if scopes:
+        bump_versions(*scopes)
+
+
+def invalidate_posts(**filters):
+    """Сбрасывает шарды постов, выбранных `filters`, и профилей их авторов.
+
+    Нужно, когда видимость постов меняется без их сохранения, например
+    при снятии категории с публикации.
+    """
+    posts, authors = set(), set()
+    rows = Post.objects.filter(**filters).values_list('pk', 'author_id')
+    for pk, author_id in rows.iterator():
+        posts.add(pk)
+        authors.add(author_id)
+    invalidate(posts=posts, profiles=authors)
+
+
+def invalidate_all():
+    bump_versions(SITEMAP_SCOPE)
+
+
+class Section:
+    """Раздел карты сайта, разбитый на шарды по диапазонам id.
+
+    Шард n — объекты с id из (n * SHARD_SIZE, (n + 1) * SHARD_SIZE].
+    Границы не зависят от данных, поэтому изменение объекта сбрасывает
+    ровно один шард, а строки шарда читаются курсором по id.
+    """
+
+    model = None
+    # Поле витрины FeedEntry, связывающее её строки с объектами раздела.
+    feed_field = None
+
+    def queryset(self, now):
+        """Словари с ключами pk и lastmod (плюс то, что нужно `location`)."""
+        raise NotImplementedError
+
+    def location(self, row):
+        raise NotImplementedError
+
+    def shard_count(self):
+        last = self.model.objects.aggregate(last=Max('pk'))['last']
+        return shard_of(last) + 1 if last else 0
+
+    def rows(self, shard, now):
+        """(путь, lastmod) шарда по возрастанию id, пачками по BATCH_SIZE."""
+        last = shard * SHARD_SIZE
+        end = last + SHARD_SIZE
+        queryset = self.queryset(now).order_by('pk')
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last, pk__lte=end)[:BATCH_SIZE])
+            for row in batch:
+                yield self.location(row), row['lastmod']
+            if len(batch) < BATCH_SIZE:
+                return
+            last = batch[-1]['pk']
+
+    def next_change(self, shard, now):
+        """Ближайшая отложенная публикация, меняющая шард без сигнала."""
+        start = shard * SHARD_SIZE
+        return FeedEntry.objects.filter(**{
+            'pub_date__gt': now,
+            f'{self.feed_field}__gt': start,
+            f'{self.feed_field}__lte': start + SHARD_SIZE,
+        }).order_by('pub_date').values_list('pub_date', flat=True).first()
+
+
+def _latest_visible(now, **filters):
+    return Subquery(
+        FeedEntry.objects.filter(pub_date__lte=now, **filters)
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+class PostSection(Section):
+    model = Post
+    feed_field = 'post_id'
+
+    def queryset(self, now):
+        return Post.objects.filter(
+            feed_entry__pub_date__lte=now,
+        ).values('pk', lastmod=F('updated_at'))
+
+    def location(self, row):
+        return reverse('blog:post_detail', args=(row['pk'],))
+
+
+class CategorySection(Section):
+    model = Category
+    feed_field = 'category_id'
+
+    def queryset(self, now):
+        return Category.objects.filter(is_published=True).annotate(
+            lastmod=_latest_visible(now, category=OuterRef('pk')),
+        ).values('pk', 'slug', 'lastmod')
+
+    def location(self, row):
+        return reverse('blog:category_posts', args=(row['slug'],))
+
+
+class ProfileSection(Section):
+    """Профили авторов, у которых есть хотя бы одна видимая публикация."""
+
+    model = User
+    feed_field = 'author_id'
+
+    def queryset(self, now):
+        return User.objects.annotate(
+            lastmod=_latest_visible(now, author=OuterRef('pk')),
+        ).filter(lastmod__isnull=False).values('pk', 'username', 'lastmod')
+
+    def location(self, row):
+        return reverse('blog:profile', args=(row['username'],))
+
+
+SECTIONS = {
+    'posts': PostSection(),
+    'categories': CategorySection(),
+    'profiles': ProfileSection(),
+}
+
+
+def render_urlset(request, rows):
+    yield XML_HEADER + f'<urlset xmlns="{NAMESPACE}">\n'
+    chunk = []
+    for path, lastmod in rows:
+        entry = f'<url><loc>{escape(request.build_absolute_uri(path))}</loc>'
+        if lastmod is not None:
+            entry += f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        chunk.append(entry + '</url>\n')
+        if len(chunk) >= BATCH_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + '</urlset>\n'
+
+
+def _file_owner():
+    """Чьи файлы шардов: общие или только этого процесса.
+
+    Версии областей живут в кеше. Если он у каждого процесса свой,
+    версии других процессов неизвестны: их файлы нельзя ни отдавать,
+    ни удалять.
+    """
+    return 'shared' if cache_is_shared() else f'pid{os.getpid()}'
+
+
+def _cache_prefix(request, section, shard):
+    """Имя файла шарда без метки срока: владелец, версии и адрес сайта."""
+    versions = get_versions([SITEMAP_SCOPE, shard_scope(section, shard)])
+    raw = '|'.join([*versions, request.build_absolute_uri('/')])
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return os.path.join(
+        str(settings.SITEMAP_CACHE_DIR),
+        f'{section}-{shard}-{_file_owner()}-{digest}-',
+    )
+
+
+def cached_shard(prefix, now):
+    """Путь к готовому файлу шарда, если он ещё верен.
+
+    Метка в конце имени — момент ближайшей отложенной публикации в
+    диапазоне (0 — таких нет); после него файл устаревает сам.
+    """
+    for path in glob.glob(glob.escape(prefix) + '*.xml'):
+        expires = int(path[len(prefix):-len('.xml')])
+        if not expires or expires > now.timestamp():
+            return path
+    return None
+
+
+def tee_to_file(chunks, path):
+    """Отдаёт куски дальше и параллельно пишет их в файл.
+
+    Файл появляется атомарно и только если генерация дошла до конца;
+    старые файлы того же шарда и того же владельца после этого
+    удаляются.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    completed = False
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.write(chunk)
+                yield chunk
+        os.replace(temporary, path)
+        completed = True
+    finally:
+        if not completed:
+            os.unlink(temporary)
+    shard_prefix = os.path.basename(path).split('-', 3)
+    pattern = os.path.join(directory, '-'.join(shard_prefix[:3]) + '-*.xml')
+    for stale in glob.glob(pattern):
+        if stale != path:
+            try:
+                os.unlink(stale)
+            except FileNotFoundError:
+                pass
+
+
+@query_budget(5)
+def sitemap_index(request):
+    """Индекс карты сайта: по ссылке на каждый шард каждого раздела."""
+    shards = [
+        (name, section.shard_count()) for name, section in SECTIONS.items()
+    ]
+
+    def render():
+        yield XML_HEADER + f'<sitemapindex xmlns="{NAMESPACE}">\n'
+        for name, count in shards:
+            for shard in range(count):
+                url = request.build_absolute_uri(
+                    reverse('blog:sitemap_shard', args=(name, shard)))
+                yield f'<sitemap><loc>{escape(url)}</loc></sitemap>\n'
+        yield '</sitemapindex>\n'
+    return StreamingHttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+def sitemap_shard(request, section, shard):
+    """Шард раздела: из файлового кеша или потоком с записью в кеш."""
+    if section not in SECTIONS:
+        raise Http404('Неизвестный раздел карты сайта.')
+    now = timezone.now()
+    prefix = _cache_prefix(request, section, shard)
+    path = cached_shard(prefix, now)
+    if path is not None:
+        return FileResponse(open(path, 'rb'), content_type=CONTENT_TYPE)
+
+    handler = SECTIONS[section]
+    if shard >= handler.shard_count():
+        raise Http404('Такого шарда нет.')
+    next_change = handler.next_change(shard, now)
+    expires = math.ceil(next_change.timestamp()) if next_change else 0
+    chunks = render_urlset(request, handler.rows(shard, now))
+    return StreamingHttpResponse(
+        tee_to_file(chunks, f'{prefix}{expires}.xml'),
+        content_type=CONTENT_TYPE,
+    )
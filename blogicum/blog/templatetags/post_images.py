@@ -0,0 +1,38 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, variant='thumb', sizes='100vw'):
+    """Картинка поста с `srcset` из уменьшенных копий.
+
+    `variant` — самая крупная копия, которую стоит предлагать браузеру:
+    в ленте хватит миниатюры, на странице поста — средней. Пока копии не
+    готовы, выводится оригинал.
+    """
+    image = post.image
+    variants = post.image_variants or {}
+    if variants.get('source') != image.name:
+        variants = {}
+    candidates = []
+    for size in variants.get('sizes', ()):
+        candidates.append(size)
+        if size['name'] == variant:
+            break
+    storage = image.storage
+    return {
+        'original': image.url,
+        'src': (
+            storage.url(candidates[-1]['jpeg']) if candidates else image.url
+        ),
+        'srcset': ', '.join(
+            f'{storage.url(size["jpeg"])} {size["width"]}w'
+            for size in candidates
+        ),
+        'webp_srcset': ', '.join(
+            f'{storage.url(size["webp"])} {size["width"]}w'
+            for size in candidates
+        ),
+        'sizes': sizes,
+    }
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, sitemaps, views
 
 app_name = 'blog'
 
@@ -10,6 +10,37 @@ urlpatterns = [
     path('posts/create/', views.create_post, name='create_post'),
     path('posts/<int:pk>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:pk>/delete/', views.delete_post, name='delete_post'),
+    path('search/', views.search, name='search'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<str:section>-<int:shard>.xml',
+        sitemaps.sitemap_shard,
+        name='sitemap_shard',
+    ),
+    path('feeds/<str:feed_format>/', feeds.site_feed, name='site_feed'),
+    path(
+        'feeds/category/<slug:category_slug>/<str:feed_format>/',
+        feeds.category_feed,
+        name='category_feed',
+    ),
+    path(
+        'feeds/profile/<str:username>/<str:feed_format>/',
+        feeds.author_feed,
+        name='author_feed',
+    ),
+    path('api/v1/posts/', api.index, name='api_index'),
+    path('api/v1/posts/<int:id>/', api.post_detail, name='api_post_detail'),
+    path(
+        'api/v1/category/<slug:category_slug>/',
+        api.category_posts,
+        name='api_category_posts',
+    ),
+    path(
+        'api/v1/profile/<str:username>/',
+        api.profile,
+        name='api_profile',
+    ),
+    path('export/posts/', views.export_posts, name='export_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('edit_profile/', views.edit_profile, name='edit_profile'),
     path('posts/<int:id>/', views.post_detail, name='post_detail'),
@@ -1,55 +1,171 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Category, Comment
-from .forms import PostForm, CommentForm, UserProfileForm
+from .models import Post, Category, Comment, FeedEntry
+from .forms import PostForm, CommentForm, UserProfileForm, ExportForm
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+
+from core.cache import cache_page_for_anonymous, page_etag
+from core.queries import query_budget
+
+from . import cache
+from .export import FORMATS, export_rows
+from .paginators import KeysetPaginator
+from .search import MAX_QUERY_LENGTH, get_search_backend
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+
 
 def get_posts(category=None, username=None):
-    queryset = Post.with_comments_count().select_related(
+    """Видимые публикации; видимость определяется витриной FeedEntry."""
+    queryset = Post.objects.select_related(
         'category',
         'location',
         'author',
     ).filter(
-        is_published=True,
-        category__is_published=True
+        feed_entry__pub_date__lte=timezone.now(),
     )
 
     if category:
         queryset = queryset.filter(category__slug=category)
-    
+
     return queryset
 
 
+def get_feed(category=None):
+    """Строки витрины ленты, уже вышедшие в публикацию."""
+    entries = FeedEntry.objects.filter(pub_date__lte=timezone.now())
+    if category is not None:
+        entries = entries.filter(category=category)
+    return entries
+
+
+def load_posts(entries):
+    """Загружает публикации для строк витрины, сохраняя их порядок."""
+    posts = Post.objects.select_related(
+        'category',
+        'location',
+        'author',
+    ).in_bulk([entry.pk for entry in entries])
+    return [posts[entry.pk] for entry in entries if entry.pk in posts]
+
+
+def paginate_posts(request, queryset, resolve=None):
+    """Страница ленты по курсору `?cursor=` с сортировкой (pub_date, id)."""
+    paginator = KeysetPaginator(queryset, POSTS_PER_PAGE, resolve=resolve)
+    return paginator.get_page(request.GET.get(paginator.cursor_param))
+
+
+@query_budget(5)
+@condition(etag_func=cache.index_etag)
+@cache_page_for_anonymous(cache.index_scopes, cache.index_cache_timeout)
 def index(request):
-    current_time = timezone.now()
-    paginator = Paginator(get_posts().filter(pub_date__lte=current_time,).order_by('-pub_date'), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_posts(request, get_feed(), resolve=load_posts)
     context = {'page_obj': page_obj}
     return render(request, 'blog/index.html', context)
 
 
+@query_budget(6)
+@condition(etag_func=cache.category_etag)
+@cache_page_for_anonymous(cache.category_scopes, cache.category_cache_timeout)
 def category_posts(request, category_slug):
-    current_time = timezone.now()
     category = get_object_or_404(Category,
                                  slug=category_slug,
                                  is_published=True)
-    paginator = Paginator(get_posts(category=category_slug).filter(pub_date__lte=current_time,).order_by('-pub_date'), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_posts(
+        request, get_feed(category=category), resolve=load_posts)
     context = {'category': category, 'page_obj': page_obj}
 
     return render(request, 'blog/category.html', context)
 
 
+@query_budget(5)
+def search(request):
+    """Поиск по заголовкам, текстам постов и комментариям.
+
+    Видимость та же, что у `get_posts`: результаты ограничены витриной
+    ленты, поэтому отложенные и снятые публикации не находятся.
+    """
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    backend = get_search_backend()
+    page_obj = None
+    if query and backend is not None:
+        paginator = Paginator(backend.search(query), POSTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'extra_query': '&' + urlencode({'q': query}) if query else '',
+    }
+    return render(request, 'blog/search.html', context)
+
+
+def get_post_for(user, id):
+    """Один запрос по первичному ключу; видимость проверяем в Python.
+
+    Автор видит свой пост всегда, остальные — только если он
+    опубликован, его категория опубликована и дата публикации наступила.
+    """
+    post = get_object_or_404(
+        Post.objects.select_related('category', 'location', 'author'),
+        pk=id,
+    )
+    if post.author_id != user.pk and not (
+            FeedEntry.is_visible(post) and post.pub_date <= timezone.now()):
+        raise Http404('Публикация не найдена.')
+    return post
+
+
+def get_request_post(request, id):
+    """`get_post_for`, выполненный один раз на запрос.
+
+    Пост нужен и валидаторам условного GET, и самому представлению.
+    """
+    if getattr(request, 'blog_post', None) is None:
+        request.blog_post = get_post_for(request.user, id)
+    return request.blog_post
+
+
+def get_comments_page(request, post_id):
+    """Страница комментариев по курсору `?comments=`.
+
+    Выбирается по id поста, поэтому не ждёт загрузки самого поста.
+    """
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author',
+    ).only('text', 'created_at', 'post', 'author__username')
+    paginator = KeysetPaginator(
+        comments,
+        COMMENTS_PER_PAGE,
+        ordering=('created_at', 'pk'),
+        cursor_param='comments',
+    )
+    return paginator.get_page(request.GET.get(paginator.cursor_param))
+
+
+def post_etag(request, id):
+    post = get_request_post(request, id)
+    # updated_at сдвигают правка поста и его комментариев.
+    return page_etag(request, (), post.updated_at.isoformat())
+
+
+def post_last_modified(request, id):
+    return get_request_post(request, id).updated_at
+
+
+@query_budget(4)
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
 def post_detail(request, id):
-    post = get_object_or_404(get_posts() | request.user.posts.all(), id=id)
+    post = get_request_post(request, id)
     form = CommentForm(request.POST or None)
-    queryset = Comment.objects.filter(post=id)
-    context = {'post': post, 'form': form, 'comments': queryset}
+    comments_page = get_comments_page(request, post.pk)
+    context = {'post': post, 'form': form, 'comments': comments_page}
     # Форму с переданным в неё объектом request.GET 
     # записываем в словарь контекста...
     if form.is_valid():
@@ -81,6 +197,7 @@ def post_detail(request, id):
 #         ...и отправляем в шаблон.
 #         return render(request, 'blog/create.html', context)
 
+@query_budget(13)
 @login_required
 def create_post(request):
     template = 'blog/create.html'
@@ -94,11 +211,12 @@ def create_post(request):
     return render(request, template, context)
 
 
+@query_budget(14)
 @login_required
 def edit_post(request, pk):
     template = 'blog/create.html'
     post = get_object_or_404(Post, id=pk)
-    if request.user != post.author:
+    if post.author_id != request.user.pk:
         return redirect('blog:post_detail', pk)
     form = PostForm(
         request.POST or None, files=request.FILES or None, instance=post)
@@ -124,11 +242,12 @@ def edit_post(request, pk):
 #         return redirect('blog:post_detail', id=pk)
 #     # ...и отправляем в шаблон.
 #     return render(request, 'blog/create.html', context)
+@query_budget(12)
 @login_required
 def delete_post(request, pk):
     template = 'blog/create.html'
     post = get_object_or_404(Post, id=pk)
-    if request.user != post.author:
+    if post.author_id != request.user.pk:
         return redirect('blog:post_detail', pk)
     form = PostForm(request.POST or None, instance=post)
     if request.method == 'POST':
@@ -138,25 +257,45 @@ def delete_post(request, pk):
     return render(request, template, context)
 
 
+def get_request_profile(request, username):
+    if getattr(request, 'blog_profile', None) is None:
+        request.blog_profile = get_object_or_404(User, username=username)
+    return request.blog_profile
+
+
+def get_profile_page(request, profile):
+    if request.user == profile:
+        # Автор видит все свои посты, в том числе снятые и отложенные:
+        # это один диапазон по индексу (author_id, pub_date, id).
+        return paginate_posts(
+            request,
+            Post.objects.select_related(
+                'category',
+                'location',
+                'author',
+            ).filter(author=profile),
+        )
+    return paginate_posts(
+        request, get_feed().filter(author=profile), resolve=load_posts)
+
+
+def profile_etag(request, username):
+    return cache.author_etag(
+        request, get_request_profile(request, username).pk)
+
+
+@query_budget(6)
+@condition(etag_func=profile_etag)
 def profile(request, username):
-    current_time = timezone.now()
-    queryset = Post.with_comments_count().select_related(
-        'category',
-        'location',
-        'author',
-    ).filter(Q(author__username=username,) & Q(pub_date__lte=current_time,) 
-             | Q(author__username=request.user.username,) & Q(pub_date__gt=current_time,))
-    profile = get_object_or_404(User, username=username)
-    paginator = Paginator(queryset.order_by('-pub_date'), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    profile = get_request_profile(request, username)
     context = {
         'profile': profile,
-        'page_obj': page_obj,
+        'page_obj': get_profile_page(request, profile),
     }
     return render(request, 'blog/profile.html', context)
 
 
+@query_budget(6)
 @login_required
 def edit_profile(request):
     user = get_object_or_404(User, pk=request.user.id)
@@ -173,12 +312,13 @@ def edit_profile(request):
     return render(request, 'blog/user.html', {'form': form})
 
 
+@query_budget(7)
 @login_required
 def add_comment(request, id, pk=None):
     post = get_object_or_404(Post, id=id)
     if pk is not None:
         comment = get_object_or_404(Comment, id=pk)
-        if request.user != comment.author:
+        if comment.author_id != request.user.pk:
             return redirect('blog:post_detail', id=id) 
     else:
         comment = None
@@ -194,11 +334,12 @@ def add_comment(request, id, pk=None):
     return render(request, 'blog/comment.html', context)
 
 
+@query_budget(9)
 @login_required
 def delete_comment(request, id, pk):
     post = get_object_or_404(Post, id=id)
     comment = get_object_or_404(Comment, id=pk)
-    if request.user != comment.author:
+    if comment.author_id != request.user.pk:
         return redirect('blog:post_detail', id=id) 
     context = {'post': post, 'comment': comment}
     # Форму с переданным в неё объектом request.GET 
@@ -208,4 +349,23 @@ def delete_comment(request, id, pk):
         comment.delete()
         return redirect('blog:post_detail', id=id)
     # ...и отправляем в шаблон.
-    return render(request, 'blog/comment.html', context)
\ No newline at end of file
+    return render(request, 'blog/comment.html', context)
+
+
+@query_budget(3)
+@staff_member_required
+def export_posts(request):
+    """Выгрузка постов файлом, который отдаётся по мере чтения из БД."""
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    filters = form.cleaned_data
+    render_rows, content_type, extension = FORMATS[
+        filters.pop('format') or 'jsonl']
+    response = StreamingHttpResponse(
+        render_rows(export_rows(**filters)),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{extension}"')
+    return response
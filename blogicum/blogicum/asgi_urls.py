@@ -0,0 +1,22 @@
+"""URLconf для ASGI: страницы чтения блога и статические страницы —
+асинхронные, остальное совпадает с blogicum.urls.
+"""
+from django.urls import include, path
+
+from .urls import handler404, handler500  # noqa: F401
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_URLCONFS = {
+    'blog': 'blog.async_urls',
+    'pages': 'pages.async_urls',
+}
+
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        include(ASYNC_URLCONFS[pattern.namespace],
+                namespace=pattern.namespace),
+    )
+    if getattr(pattern, 'namespace', None) in ASYNC_URLCONFS else pattern
+    for pattern in sync_urlpatterns
+]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-#c3)v(jopu55mk^wi^1b8v^kr^8wvz1@dfccpxzr3712cmo(e#'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('BLOGICUM_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -44,28 +45,42 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_bootstrap5',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    # Снаружи остальных: запросы самого журнала не попадают ни в
+    # метрики, ни в бюджеты представлений.
+    'core.queries.SlowQueryMiddleware',
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.queries.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
-ROOT_URLCONF = 'blogicum.urls'
+# Панель отладки дорого обходится каждому запросу: только для разработки.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+# Под ASGI (см. asgi.py) страницы чтения обслуживают асинхронные версии
+# представлений; BLOGICUM_ASYNC_VIEWS=0 возвращает синхронные.
+ASYNC_VIEWS = os.environ.get('BLOGICUM_ASYNC_VIEWS') == '1'
+ROOT_URLCONF = 'blogicum.asgi_urls' if ASYNC_VIEWS else 'blogicum.urls'
+# Потоки (и соединения с БД), в которых асинхронные представления
+# выполняют запросы к базе и отрисовку шаблонов.
+ASYNC_DB_WORKERS = int(os.environ.get('BLOGICUM_ASYNC_DB_WORKERS', 8))
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
  
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         # Указываем, в каких директориях искать HTML-шаблоны.
         'DIRS': [TEMPLATES_DIR],
 
@@ -99,6 +114,23 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сколько секунд хранится целая страница для анонимных посетителей.
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Планировщик отложенных публикаций в потоке каждого веб-процесса: так
+# он сбрасывает и прогревает кеш того же процесса. Отдельной команде
+# run_publication_scheduler нужен общий для процессов кеш.
+PUBLICATION_SCHEDULER_IN_PROCESS = (
+    os.environ.get('BLOGICUM_PUBLICATION_SCHEDULER') == '1'
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -157,8 +189,64 @@ LOGIN_REDIRECT_URL = 'blog:index'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузки хранятся по хешу содержимого и не дублируются.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Потоки, в которых строятся уменьшенные копии изображений постов;
+# 0 — строить сразу в потоке запроса.
+IMAGE_WORKERS = 2
+
 LOGIN_URL = 'login' 
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # Указываем директорию, в которую будут сохраняться файлы писем:
-EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
\ No newline at end of file
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Файловый кеш шардов карты сайта. Процессы делят его файлы, только если
+# общий сам кеш CACHES; с LocMemCache каждый процесс отдаёт и удаляет
+# лишь свои файлы. Очищайте каталог при перезапуске.
+SITEMAP_CACHE_DIR = BASE_DIR / 'sitemap_cache'
+
+# Каталог, куда процессы сбрасывают свои метрики для /metrics. Очищайте
+# его при перезапуске; без каталога /metrics видит только свой процесс.
+METRICS_DIR = os.getenv('BLOGICUM_METRICS_DIR')
+# Как часто (в секундах) процесс переписывает свой файл метрик.
+METRICS_FLUSH_INTERVAL = 5
+# С каких адресов доступен /metrics; пустой список — с любых.
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# Запросы дольше порога (мс) пишутся в журнал SLOW_QUERY_LOG_FILE и
+# сводку в админке; None — не следить.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'slow_queries.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # Сообщение журнала медленных запросов — уже готовая строка JSON.
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Что делать, если представление превысило бюджет SQL-запросов
+# (@query_budget): 'raise', 'log' или None. По умолчанию 'log' при DEBUG.
+QUERY_BUDGET_MODE = 'log' if DEBUG else None
@@ -1,3 +1,26 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SlowQueryRecord
+
+
+@admin.register(SlowQueryRecord)
+class SlowQueryRecordAdmin(admin.ModelAdmin):
+    list_display = (
+        'view_name',
+        'location',
+        'calls',
+        'max_ms',
+        'mean_ms',
+        'last_seen',
+    )
+    list_filter = ('view_name',)
+    search_fields = ('sql', 'location')
+    readonly_fields = tuple(
+        field.name for field in SlowQueryRecord._meta.fields)
+
+    @admin.display(description='в среднем, мс')
+    def mean_ms(self, record):
+        return round(record.total_ms / record.calls, 1) if record.calls else 0
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import functools
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from django.urls import URLPattern
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import is_aware, make_aware, utc
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул потоков, в котором асинхронные представления ходят в базу.
+
+    Пул ограничен ASYNC_DB_WORKERS: у каждого потока своё соединение,
+    поэтому это заодно и предел соединений процесса, сколько бы запросов
+    ни ждало в цикле событий.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_DB_WORKERS,
+                thread_name_prefix='blogicum-db',
+            )
+        return _executor
+
+
+def _call_in_worker(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Соединение потока пула переживает вызов: закрываем его, только
+        # если на нём были ошибки и оно перестало работать.
+        for connection in connections.all():
+            if connection.errors_occurred:
+                connection.close_if_unusable_or_obsolete()
+
+
+def database_sync_to_async(func):
+    """Асинхронная обёртка синхронной функции, работающей с базой.
+
+    Функция выполняется в пуле `get_executor` с копией текущего
+    контекста: обёртки запросов из `core.queries.request_execute_wrappers`
+    и метрики запроса видят и эти запросы.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(),
+            functools.partial(
+                context.run, _call_in_worker, func, *args, **kwargs),
+        )
+    return wrapper
+
+
+def resolve_user(request):
+    """Читает пользователя сессии; ленивый `request.user` его запомнит."""
+    return request.user.is_authenticated
+
+
+def evaluate_validators(request, etag_func=None, last_modified_func=None,
+                        *args, **kwargs):
+    """Валидаторы ETag и Last-Modified (метка времени), как у `condition`."""
+    etag = last_modified = None
+    if last_modified_func is not None:
+        moment = last_modified_func(request, *args, **kwargs)
+        if moment:
+            if not is_aware(moment):
+                moment = make_aware(moment, utc)
+            last_modified = int(moment.timestamp())
+    if etag_func is not None:
+        etag = etag_func(request, *args, **kwargs)
+        etag = quote_etag(etag) if etag is not None else None
+    return etag, last_modified
+
+
+def with_validators(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+    return response
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """`django.views.decorators.http.condition` для асинхронных представлений.
+
+    Валидаторы — те же синхронные функции, что у синхронных версий
+    представлений; считаются они в пуле `get_executor`.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = await database_sync_to_async(
+                evaluate_validators,
+            )(request, etag_func, last_modified_func, *args, **kwargs)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return with_validators(request, response, etag, last_modified)
+        return inner
+    return decorator
+
+
+def _spool(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if not response.streaming or isinstance(response, FileResponse):
+        return response
+    file = tempfile.TemporaryFile()
+    try:
+        for chunk in response.streaming_content:
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    finally:
+        response.close()
+    file.seek(0)
+    spooled = FileResponse(file, status=response.status_code)
+    for header, value in response.items():
+        spooled[header] = value
+    return spooled
+
+
+def spooled_view(view):
+    """Асинхронная версия синхронного представления с потоковым ответом.
+
+    Django 3.2 читает потоковый ответ прямо в цикле событий, и генератор,
+    который ходит в базу, там падает. Здесь представление вместе со всем
+    телом ответа выполняется в пуле `get_executor`, тело пишется во
+    временный файл и отдаётся из него: память не растёт, но первый байт
+    уходит только после того, как тело собрано целиком.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await database_sync_to_async(_spool)(
+            view, request, *args, **kwargs)
+    return wrapper
+
+
+class AsyncCapableMiddleware:
+    """Основа middleware, работающего и в WSGI-, и в ASGI-цепочке.
+
+    Синхронное middleware в ASGI-цепочке Django выполняет в одном общем
+    потоке, и асинхронные представления под ним теряют смысл. Подкласс
+    реализует `call` для синхронной цепочки и `acall` — для асинхронной.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django распознаёт экземпляр как корутинную функцию.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def acall(self, request):
+        raise NotImplementedError
+
+
+def with_async_views(urlpatterns, views):
+    """Копия маршрутов, где представления из `views` (имя маршрута ->
+    асинхронное представление) подменяют синхронные.
+    """
+    return [
+        URLPattern(
+            pattern.pattern,
+            views.get(pattern.name, pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        for pattern in urlpatterns
+    ]
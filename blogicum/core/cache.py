@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+from .aio import database_sync_to_async
+from .metrics import record_cache
+
+VERSION_KEY_PREFIX = 'cache-version:'
+PAGE_KEY_PREFIX = 'anonymous-page:'
+# Кеш, который каждый процесс держит свой: другие процессы его не видят.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def cache_is_shared():
+    """Видят ли другие процессы то, что этот процесс пишет в кеш."""
+    return not isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+def get_versions(scopes):
+    """Возвращает текущие версии областей кеша, создавая недостающие."""
+    keys = [VERSION_KEY_PREFIX + scope for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {
+        key: uuid.uuid4().hex for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Делает недействительными все страницы, зависящие от областей.
+
+    Версия — случайная строка, а не счётчик: если ключ версии вытеснят
+    из кеша, новая версия не совпадёт ни с одной старой страницей.
+    """
+    cache.set_many(
+        {VERSION_KEY_PREFIX + scope: uuid.uuid4().hex for scope in scopes},
+        timeout=None,
+    )
+
+
+def page_etag(request, scopes, *parts):
+    """Слабый ETag страницы: версии областей, `parts` и пользователь.
+
+    Считается без запросов к витрине: версии лежат в кеше. Пользователь
+    входит в тег, потому что шапка и ссылки на правку у всех разные.
+    """
+    user = request.user
+    raw = '|'.join([
+        *get_versions(scopes),
+        *(str(part) for part in parts),
+        str(user.pk),
+        user.get_username(),
+    ])
+    return 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_page_for_anonymous(scopes=None, timeout=None,
+                             query_params=('page', 'cursor')):
+    """Кеширует ответ целиком, но только для анонимных GET-запросов.
+
+    `scopes(request, *args, **kwargs)` возвращает области, от которых
+    зависит страница; ключ строится из пути, параметров `query_params`
+    и версий этих областей. `timeout` — число секунд или функция с той же
+    сигнатурой, что и `scopes`. Вместе с телом хранятся заголовки,
+    которые выставило представление. Асинхронное представление получает
+    асинхронную обёртку: чтение сессии и кеша уходит в пул `core.aio`.
+    """
+    def decorator(view):
+        options = (scopes, timeout, query_params)
+        if asyncio.iscoroutinefunction(view):
+            return _async_cached_view(view, options)
+        return _cached_view(view, options)
+    return decorator
+
+
+def _cached_view(view, options):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key, cached = _lookup(options, request, args, kwargs)
+        if cached is not None:
+            return cached
+        response = view(request, *args, **kwargs)
+        if key is None:
+            return response
+        return _store(options, key, request, response, args, kwargs)
+    return wrapper
+
+
+def _async_cached_view(view, options):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        key, cached = await database_sync_to_async(_lookup)(
+            options, request, args, kwargs)
+        if cached is not None:
+            return cached
+        response = await view(request, *args, **kwargs)
+        if key is None:
+            return response
+        return await database_sync_to_async(_store)(
+            options, key, request, response, args, kwargs)
+    return wrapper
+
+
+def _lookup(options, request, args, kwargs):
+    """Ключ и готовый ответ из кеша; ключ None — кешировать нельзя."""
+    if (request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated):
+        return None, None
+    scopes, _, query_params = options
+    page_scopes = scopes(request, *args, **kwargs) if scopes else ()
+    key = _page_key(request, query_params, get_versions(page_scopes))
+    cached = cache.get(key)
+    record_cache('page', cached is not None)
+    if cached is None:
+        return key, None
+    content, headers = cached
+    response = HttpResponse(content)
+    for header, value in headers:
+        response[header] = value
+    return key, response
+
+
+def _store(options, key, request, response, args, kwargs):
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    if response.status_code != 200 or response.cookies:
+        return response
+    _, timeout, _ = options
+    seconds = (timeout(request, *args, **kwargs)
+               if callable(timeout) else timeout)
+    if seconds is None:
+        seconds = settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+    if seconds > 0:
+        cache.set(key, (response.content, list(response.items())), seconds)
+    return response
+
+
+def _page_key(request, query_params, versions):
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in query_params
+    )
+    raw = '|'.join([request.path, params, *versions])
+    return PAGE_KEY_PREFIX + hashlib.md5(raw.encode()).hexdigest()
@@ -0,0 +1,348 @@
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates,
+    Template,
+    reraise,
+)
+
+from .aio import AsyncCapableMiddleware
+from .queries import request_execute_wrappers
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Имя метрики -> (тип, описание, границы корзин гистограммы).
+METRICS = {
+    'blogicum_requests_total': (
+        'counter', 'Обработанные запросы.', None),
+    'blogicum_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.', LATENCY_BUCKETS),
+    'blogicum_db_duration_seconds': (
+        'histogram', 'Время SQL-запросов за запрос.', LATENCY_BUCKETS),
+    'blogicum_db_queries': (
+        'histogram', 'Число SQL-запросов за запрос.', QUERY_BUCKETS),
+    'blogicum_template_render_seconds': (
+        'histogram', 'Время отрисовки шаблонов за запрос.', LATENCY_BUCKETS),
+    'blogicum_cache_requests_total': (
+        'counter', 'Обращения к кешу страниц: попадания и промахи.', None),
+}
+FILE_PREFIX = 'metrics-'
+
+
+class Registry:
+    """Метрики процесса: счётчики и гистограммы с метками.
+
+    Метки — кортеж пар (имя, значение). Доступ защищён блокировкой:
+    в одном процессе запросы обслуживаются несколькими потоками.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'counts': [0] * len(buckets), 'sum': 0, 'count': 0,
+                }
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        """Состояние в виде, пригодном для JSON и `merge()`."""
+        with self.lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), **histogram,
+                     'counts': list(histogram['counts'])}
+                    for (name, labels), histogram
+                    in self.histograms.items()
+                ],
+            }
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+def merge(snapshots):
+    """Складывает снимки нескольких процессов в один."""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for item in snapshot['counters']:
+            key = (item['name'], tuple(sorted(item['labels'].items())))
+            counters[key] = counters.get(key, 0) + item['value']
+        for item in snapshot['histograms']:
+            key = (item['name'], tuple(sorted(item['labels'].items())))
+            total = histograms.setdefault(key, {
+                'counts': [0] * len(item['counts']), 'sum': 0, 'count': 0,
+            })
+            total['counts'] = [
+                a + b for a, b in zip(total['counts'], item['counts'])
+            ]
+            total['sum'] += item['sum']
+            total['count'] += item['count']
+    return {
+        'counters': [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in counters.items()
+        ],
+        'histograms': [
+            {'name': name, 'labels': dict(labels), **histogram}
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+def _labels(labels, **extra):
+    pairs = sorted({**labels, **extra}.items())
+    if not pairs:
+        return ''
+    escaped = (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+        for _, value in pairs
+    )
+    return '{' + ','.join(
+        f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)
+    ) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(snapshot):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    by_name = {}
+    for item in snapshot['counters'] + snapshot['histograms']:
+        by_name.setdefault(item['name'], []).append(item)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        items = sorted(
+            by_name.get(name, ()),
+            key=lambda item: sorted(item['labels'].items()),
+        )
+        if not items:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for item in items:
+            labels = item['labels']
+            if kind == 'counter':
+                value = _number(item['value'])
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, item['counts']):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{_labels(labels, le=_number(bound))} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_bucket{_labels(labels, le="+Inf")} {item["count"]}')
+            total = _number(item['sum'])
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {item["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _own_file(directory):
+    return os.path.join(directory, f'{FILE_PREFIX}{os.getpid()}.json')
+
+
+def flush(directory=None):
+    """Записывает снимок процесса в METRICS_DIR атомарной заменой файла."""
+    directory = directory or settings.METRICS_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+        json.dump(registry.snapshot(), file)
+    os.replace(temporary, _own_file(directory))
+
+
+def collect():
+    """Снимок всех процессов: файлы из METRICS_DIR и живые данные своего.
+
+    Без METRICS_DIR видны только метрики текущего процесса.
+    """
+    snapshots = [registry.snapshot()]
+    directory = settings.METRICS_DIR
+    if directory:
+        own = _own_file(directory)
+        pattern = os.path.join(directory, FILE_PREFIX + '*.json')
+        for path in glob.glob(pattern):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding='utf-8') as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # Файл удалили между glob и open — пропускаем.
+                continue
+    return merge(snapshots)
+
+
+class RequestMetrics:
+    """То, что накапливается за время обработки одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def record_cache(cache_name, hit):
+    registry.inc('blogicum_cache_requests_total', {
+        'cache': cache_name, 'result': 'hit' if hit else 'miss',
+    })
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        current = _current.get()
+        if current is None or current.rendering:
+            # Вложенная отрисовка уже учтена внешней.
+            return super().render(context, request)
+        current.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            current.template_seconds += time.perf_counter() - started
+            current.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время отрисовки для метрик."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Собирает задержку, время БД и шаблонов по имени маршрута.
+
+    Метка `view` — имя маршрута (`blog:index`), а не путь: число рядов
+    не растёт с числом постов. Метрики копятся в памяти процесса и, если
+    задан METRICS_DIR, сбрасываются в файл процесса не чаще раза в
+    METRICS_FLUSH_INTERVAL секунд; `/metrics` складывает файлы всех
+    процессов.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.last_flush = time.monotonic()
+
+    def call(self, request):
+        current = RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            with request_execute_wrappers(current):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.observe(request, response, current, started)
+        return response
+
+    async def acall(self, request):
+        current = RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            with request_execute_wrappers(current):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.observe(request, response, current, started)
+        return response
+
+    def observe(self, request, response, current, started):
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.inc('blogicum_requests_total', {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        labels = {'view': view}
+        registry.observe('blogicum_request_duration_seconds', labels, elapsed)
+        registry.observe(
+            'blogicum_db_duration_seconds', labels, current.db_seconds)
+        registry.observe('blogicum_db_queries', labels, current.queries)
+        registry.observe(
+            'blogicum_template_render_seconds', labels,
+            current.template_seconds,
+        )
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if now - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.last_flush = now
+            flush()
+
+
+atexit.register(flush)
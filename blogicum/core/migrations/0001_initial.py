@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQueryRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('sql', models.TextField(verbose_name='запрос')),
+                ('plan', models.TextField(blank=True, verbose_name='план выполнения')),
+                ('view_name', models.CharField(max_length=200, verbose_name='представление')),
+                ('location', models.CharField(max_length=300, verbose_name='место в коде')),
+                ('calls', models.PositiveIntegerField(default=0, verbose_name='вызовов')),
+                ('total_ms', models.FloatField(default=0, verbose_name='всего, мс')),
+                ('max_ms', models.FloatField(default=0, verbose_name='максимум, мс')),
+                ('first_seen', models.DateTimeField(auto_now_add=True, verbose_name='впервые')),
+                ('last_seen', models.DateTimeField(auto_now=True, verbose_name='последний раз')),
+            ],
+            options={
+                'verbose_name': 'медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-max_ms',),
+            },
+        ),
+    ]
@@ -16,3 +16,26 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class SlowQueryRecord(models.Model):
+    """Медленный запрос одной формы: SQL с литералами, заменёнными на ?."""
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField('запрос')
+    plan = models.TextField('план выполнения', blank=True)
+    view_name = models.CharField('представление', max_length=200)
+    location = models.CharField('место в коде', max_length=300)
+    calls = models.PositiveIntegerField('вызовов', default=0)
+    total_ms = models.FloatField('всего, мс', default=0)
+    max_ms = models.FloatField('максимум, мс', default=0)
+    first_seen = models.DateTimeField('впервые', auto_now_add=True)
+    last_seen = models.DateTimeField('последний раз', auto_now=True)
+
+    class Meta:
+        verbose_name = 'медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-max_ms',)
+
+    def __str__(self):
+        return f'{self.view_name}: {self.sql[:80]}'
@@ -0,0 +1,316 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .aio import AsyncCapableMiddleware, database_sync_to_async
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('core.slow_queries')
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше SQL-запросов, чем ему разрешено."""
+
+
+_request_wrappers = ContextVar('request_execute_wrappers', default=())
+
+
+@contextmanager
+def request_execute_wrappers(*wrappers):
+    """Оборачивает запросы к БД, выполненные в текущем контексте.
+
+    В отличие от `connection.execute_wrapper`, обёртки видны и в потоках
+    пула асинхронных представлений (контекст копируется вместе с
+    вызовом) и не задевают другие запросы, которые цикл событий
+    обслуживает в том же потоке.
+    """
+    token = _request_wrappers.set(_request_wrappers.get() + wrappers)
+    try:
+        yield
+    finally:
+        _request_wrappers.reset(token)
+
+
+def dispatch_request_wrappers(execute, sql, params, many, context):
+    for wrapper in reversed(_request_wrappers.get()):
+        execute = functools.partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_request_wrappers(sender, connection, **kwargs):
+    """Обработчик `connection_created`: ставит на соединение диспетчер
+    обёрток из `request_execute_wrappers`.
+    """
+    if dispatch_request_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_request_wrappers)
+
+
+class QueryCounter:
+    """execute_wrapper, считающий запросы.
+
+    CaptureQueriesContext для подсчёта по запросу не подходит: сигнал
+    request_started очищает connection.queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(limit):
+    """Объявляет, сколько SQL-запросов может выполнить представление.
+
+    В бюджет входят все запросы обработки, включая чтение сессии и
+    пользователя. Проверяет его `QueryBudgetMiddleware`. Декоратор должен
+    быть внешним, чтобы атрибут был виден на функции из URLconf.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget_mode():
+    """'raise', 'log' или None; по умолчанию 'log' при DEBUG."""
+    default = 'log' if settings.DEBUG else None
+    return getattr(settings, 'QUERY_BUDGET_MODE', default)
+
+
+class QueryBudgetMiddleware(AsyncCapableMiddleware):
+    """Считает запросы к БД и сверяет их с бюджетом представления."""
+
+    def call(self, request):
+        mode = get_query_budget_mode()
+        if not mode:
+            return self.get_response(request)
+        counter = QueryCounter()
+        with request_execute_wrappers(counter):
+            response = self.get_response(request)
+        return self.finish(request, response, mode, counter)
+
+    async def acall(self, request):
+        mode = get_query_budget_mode()
+        if not mode:
+            return await self.get_response(request)
+        counter = QueryCounter()
+        with request_execute_wrappers(counter):
+            response = await self.get_response(request)
+        return self.finish(request, response, mode, counter)
+
+    def finish(self, request, response, mode, counter):
+        """Проверяет бюджет сразу или, для потокового ответа, в конце тела.
+
+        Потоковое тело читает базу уже после возврата из представления:
+        эти запросы тоже входят в бюджет.
+        """
+        if (response.streaming
+                and getattr(request, 'query_budget', None) is not None):
+            response.streaming_content = self.counted(
+                response.streaming_content, request, mode, counter)
+        else:
+            self.check(request, mode, counter)
+        return response
+
+    def counted(self, content, request, mode, counter):
+        # Обёртки ставятся на каждый шаг, а не на всё время ответа:
+        # между кусками контекст принадлежит серверу.
+        iterator = iter(content)
+        while True:
+            with request_execute_wrappers(counter):
+                chunk = next(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.check(request, mode, counter)
+
+    def check(self, request, mode, counter):
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{request.resolver_match.view_name}: '
+                f'{counter.count} SQL-запросов при бюджете {budget} '
+                f'({request.method} {request.get_full_path()})'
+            )
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """SQL без значений: литералы и параметры заменены на ?, списки IN
+    любой длины свёрнуты в (...).
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def code_location():
+    """Ближайший к запросу кадр стека из кода проекта, например
+    `blog/views.py:64 in index`.
+    """
+    root = os.path.join(str(settings.BASE_DIR), '')
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(root) and filename != __file__
+                and os.sep + 'site-packages' + os.sep not in filename):
+            return (f'{os.path.relpath(filename, root)}:{frame.f_lineno} '
+                    f'in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return ''
+
+
+class SlowQueryCollector:
+    """execute_wrapper, запоминающий запросы дольше порога.
+
+    Стек снимается только у медленных запросов, поэтому быстрые почти
+    ничего не стоят.
+    """
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.queries.append({
+                    'sql': sql,
+                    'params': None if many else params,
+                    'duration_ms': duration_ms,
+                    'location': code_location(),
+                })
+
+
+def explain(sql, params):
+    """План запроса или '' для СУБД без поддержки и не-SELECT."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or params is None or not re.match(
+            r'\s*(SELECT|WITH)\b', sql, re.IGNORECASE):
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return ''
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+def record_slow_query(view_name, query):
+    """Пишет запрос в журнал и обновляет сводку по его форме.
+
+    EXPLAIN выполняется один раз на форму запроса: план хранится в
+    `SlowQueryRecord`.
+    """
+    from .models import SlowQueryRecord
+
+    shape = query_shape(query['sql'])
+    fingerprint = hashlib.sha1(shape.encode()).hexdigest()
+    duration = query['duration_ms']
+    updated = SlowQueryRecord.objects.filter(fingerprint=fingerprint).update(
+        calls=F('calls') + 1,
+        total_ms=F('total_ms') + duration,
+        max_ms=Greatest('max_ms', duration),
+        view_name=view_name,
+        location=query['location'],
+        last_seen=timezone.now(),
+    )
+    first = not updated
+    if first:
+        SlowQueryRecord.objects.create(
+            fingerprint=fingerprint,
+            sql=shape,
+            plan=explain(query['sql'], query['params']),
+            view_name=view_name,
+            location=query['location'],
+            calls=1,
+            total_ms=duration,
+            max_ms=duration,
+        )
+    slow_query_logger.warning(json.dumps({
+        'time': timezone.now().isoformat(),
+        'view': view_name,
+        'location': query['location'],
+        'duration_ms': round(duration, 3),
+        'fingerprint': fingerprint,
+        'sql': query['sql'],
+        'first_seen': first,
+    }, ensure_ascii=False))
+
+
+class SlowQueryMiddleware(AsyncCapableMiddleware):
+    """Ведёт журнал запросов дольше SLOW_QUERY_THRESHOLD_MS.
+
+    Медленные запросы собираются во время обработки, а записываются
+    после неё, когда обёртка уже снята: собственные запросы журнала
+    (EXPLAIN, обновление сводки) в него не попадают.
+    """
+
+    def call(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return self.get_response(request)
+        collector = SlowQueryCollector(threshold)
+        with request_execute_wrappers(collector):
+            response = self.get_response(request)
+        if collector.queries:
+            self.record(request, collector)
+        return response
+
+    async def acall(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return await self.get_response(request)
+        collector = SlowQueryCollector(threshold)
+        with request_execute_wrappers(collector):
+            response = await self.get_response(request)
+        if collector.queries:
+            await database_sync_to_async(self.record)(request, collector)
+        return response
+
+    def record(self, request, collector):
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        for query in collector.queries:
+            try:
+                record_slow_query(view_name, query)
+            except DatabaseError:
+                logger.exception('Не удалось записать медленный запрос')
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем, вычисленным из их содержимого.
+
+    `post_image/photo.JPG` сохраняется как
+    `post_image/ab/cd/abcd….jpg`, где `abcd…` — sha256 содержимого:
+    одинаковые загрузки занимают один файл, а коллизий имён, которые
+    `FileSystemStorage` разрешает перебором суффиксов, не бывает.
+    Загрузка пишется во временный файл и хешируется за один проход,
+    затем атомарно переносится на место.
+
+    Один файл может принадлежать нескольким объектам, поэтому удалять
+    его можно, только убедившись, что ссылок больше нет.
+    """
+
+    hash_name = 'sha256'
+    shard_depth = 2
+    incoming_dir = '.incoming'
+
+    def get_available_name(self, name, max_length=None):
+        # Настоящее имя станет известно в _save(), после хеширования.
+        return name
+
+    def hashed_name(self, name, digest):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return posixpath.join(directory, *shards, digest + extension)
+
+    def _save(self, name, content):
+        incoming = self.path(self.incoming_dir)
+        self._makedirs(incoming)
+        digest = hashlib.new(self.hash_name)
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = self.hashed_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if not os.path.exists(full_path):
+                self._makedirs(os.path.dirname(full_path))
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                # Одновременная загрузка того же файла заменит его
+                # идентичным содержимым — это безопасно.
+                os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is None:
+            os.makedirs(directory, exist_ok=True)
+            return
+        # os.makedirs() не применяет mode к промежуточным каталогам.
+        old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+        try:
+            os.makedirs(
+                directory, self.directory_permissions_mode, exist_ok=True)
+        finally:
+            os.umask(old_umask)
@@ -0,0 +1,10 @@
+from core.aio import with_async_views
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+urlpatterns = with_async_views(urls.urlpatterns, {
+    'about': async_views.about,
+    'rules': async_views.rules,
+})
@@ -0,0 +1,16 @@
+from django.shortcuts import render
+
+from core.aio import database_sync_to_async
+from core.cache import cache_page_for_anonymous
+
+render_async = database_sync_to_async(render)
+
+
+@cache_page_for_anonymous()
+async def about(request):
+    return await render_async(request, 'pages/about.html')
+
+
+@cache_page_for_anonymous()
+async def rules(request):
+    return await render_async(request, 'pages/rules.html')
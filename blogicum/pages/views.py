@@ -1,11 +1,16 @@
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
+from core.cache import cache_page_for_anonymous
 
+
+@method_decorator(cache_page_for_anonymous(), name='dispatch')
 class AboutPage(TemplateView):
     template_name = 'pages/about.html'
 
 
+@method_decorator(cache_page_for_anonymous(), name='dispatch')
 class RulesPage(TemplateView):
     template_name = 'pages/rules.html'
 
@@ -1,6 +1,7 @@
 import os
 import re
 import time
+from datetime import timedelta
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
@@ -24,6 +25,7 @@ from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.utils import timezone
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +43,22 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    # Превышение бюджета запросов в тестах — ошибка, а не предупреждение.
+    settings.QUERY_BUDGET_MODE = 'raise'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш переживает откат БД между тестами: начинаем каждый тест с нуля.
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +151,23 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def make_post():
+    """Фабрика постов: по умолчанию опубликован `minutes_ago` минут назад."""
+    def make_post(author, category, title, minutes_ago=10, **kwargs):
+        kwargs.setdefault(
+            "pub_date", timezone.now() - timedelta(minutes=minutes_ago))
+        return Post.objects.create(
+            title=title,
+            text=f"Текст: {title}",
+            author=author,
+            category=category,
+            **kwargs,
+        )
+
+    return make_post
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
@@ -363,6 +398,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
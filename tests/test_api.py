@@ -0,0 +1,115 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _get_json(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("application/json")
+    return json.loads(b"".join(response.streaming_content))
+
+
+def test_index_follows_visibility_rules(client, user, published_category,
+                                        make_post):
+    make_post(user, published_category, "Вышел")
+    make_post(user, published_category, "Снят", is_published=False)
+    make_post(user, published_category, "Отложен", minutes_ago=-60)
+
+    data = _get_json(client, reverse("blog:api_index"))
+    assert [post["title"] for post in data["results"]] == ["Вышел"]
+    assert data["results"][0]["author"] == user.username
+    assert data["results"][0]["category"] == published_category.slug
+    assert data["next"] is None and data["previous"] is None
+
+
+def test_sparse_fieldsets(client, user, published_category, make_post):
+    make_post(user, published_category, "Вышел")
+    url = reverse("blog:api_index")
+
+    with CaptureQueriesContext(connection) as queries:
+        data = _get_json(client, url)
+    assert "text" not in data["results"][0], (
+        "Убедитесь, что текст поста в списках отдаётся только по запросу."
+    )
+    assert not any('."text"' in query["sql"] for query in queries), (
+        "Убедитесь, что незапрошенный текст поста не читается из базы."
+    )
+
+    data = _get_json(client, url, fields="title,text")
+    assert data["results"] == [
+        {"id": data["results"][0]["id"], "title": "Вышел",
+         "text": "Текст: Вышел"}
+    ]
+
+    response = client.get(url, {"fields": "title,password"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "password" in response.json()["error"]
+
+
+def test_cursor_pagination(client, user, published_category, make_post):
+    for index in range(15):
+        make_post(user, published_category, f"Пост {index}",
+                  minutes_ago=100 - index)
+
+    first = _get_json(client, reverse("blog:api_category_posts",
+                                      args=(published_category.slug,)),
+                      fields="title")
+    assert len(first["results"]) == 10
+    assert first["next"].startswith("http://testserver/")
+    assert "fields=title" in first["next"], (
+        "Убедитесь, что ссылка на следующую страницу сохраняет `fields`."
+    )
+    second = json.loads(b"".join(client.get(first["next"]).streaming_content))
+    assert [post["title"] for post in first["results"] + second[
+        "results"]] == [f"Пост {index}" for index in range(14, -1, -1)]
+    assert second["next"] is None and second["previous"]
+
+
+def test_profile_shows_hidden_posts_to_author(client, user_client, user,
+                                              published_category, make_post):
+    make_post(user, published_category, "Вышел")
+    make_post(user, published_category, "Снят", minutes_ago=20,
+              is_published=False)
+    url = reverse("blog:api_profile", args=(user.username,))
+
+    assert [post["title"] for post in _get_json(client, url)[
+        "results"]] == ["Вышел"]
+    assert [post["title"] for post in _get_json(user_client, url)[
+        "results"]] == ["Вышел", "Снят"]
+
+
+def test_post_detail_with_comments(client, user, another_user,
+                                   published_category, make_post):
+    post = make_post(user, published_category, "Вышел")
+    for text in ("Первый", "Второй"):
+        Comment.objects.create(post=post, author=another_user, text=text)
+    url = reverse("blog:api_post_detail", args=(post.pk,))
+
+    data = _get_json(client, url)
+    assert data["post"]["text"] == "Текст: Вышел"
+    assert data["post"]["location"] is None
+    assert [comment["text"] for comment in data["comments"]["results"]] == [
+        "Первый", "Второй"]
+    assert data["comments"]["results"][0]["author"] == another_user.username
+
+    response = client.get(url)
+    repeated = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_hidden_post_detail(client, user_client, user, published_category,
+                            make_post):
+    post = make_post(user, published_category, "Отложен", minutes_ago=-60)
+    url = reverse("blog:api_post_detail", args=(post.pk,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    assert _get_json(user_client, url)["post"]["title"] == "Отложен"
+    assert client.post(url).status_code == HTTPStatus.METHOD_NOT_ALLOWED
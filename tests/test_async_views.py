@@ -0,0 +1,154 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import async_views
+from blog.models import Comment, Post
+from core.queries import QueryBudgetExceeded
+
+# Пул потоков ходит в базу своими соединениями: данные теста должны
+# быть зафиксированы, а не висеть в транзакции основного потока.
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def async_urlconf(settings):
+    settings.ROOT_URLCONF = "blogicum.asgi_urls"
+
+
+@pytest.fixture
+def page_urls(post_with_published_location):
+    post = post_with_published_location
+    return {
+        "index": reverse("blog:index"),
+        "category": reverse(
+            "blog:category_posts", args=(post.category.slug,)),
+        "profile": reverse("blog:profile", args=(post.author.username,)),
+        "post_detail": reverse("blog:post_detail", args=(post.pk,)),
+        "about": reverse("pages:about"),
+    }
+
+
+def test_read_pages_are_async(page_urls, client):
+    for name, url in page_urls.items():
+        match = client.get(url).resolver_match
+        assert match.func.__module__.endswith("async_views"), (
+            f"Убедитесь, что в ASGI-маршрутах страница `{name}` "
+            "асинхронная."
+        )
+
+
+@pytest.mark.parametrize("page", ["index", "category", "profile",
+                                  "post_detail", "about"])
+def test_async_pages_match_sync_ones(page_urls, page, user_client,
+                                     post_with_published_location):
+    Comment.objects.create(
+        post=post_with_published_location,
+        author=post_with_published_location.author,
+        text="Комментарий к посту",
+    )
+    response = user_client.get(page_urls[page])
+    assert response.status_code == HTTPStatus.OK
+    if page != "about":
+        assert post_with_published_location.title in response.content.decode()
+    if page == "post_detail":
+        assert "Комментарий к посту" in response.content.decode()
+
+
+@async_to_sync
+async def _asgi_get(url):
+    return await AsyncClient().get(url)
+
+
+def test_asgi_handler_serves_async_pages(page_urls):
+    for url in page_urls.values():
+        assert _asgi_get(url).status_code == HTTPStatus.OK
+
+
+def test_pool_queries_count_against_budget(page_urls, client, monkeypatch):
+    monkeypatch.setattr(async_views.post_detail, "query_budget", 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(page_urls["post_detail"])
+    with pytest.raises(QueryBudgetExceeded):
+        _asgi_get(page_urls["post_detail"])
+
+
+def test_conditional_get(page_urls, client):
+    for name in ("index", "post_detail"):
+        response = client.get(page_urls[name])
+        repeated = client.get(
+            page_urls[name], HTTP_IF_NONE_MATCH=response["ETag"])
+        assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_hidden_objects(client, mixer, user, published_category):
+    post = Post.objects.create(
+        title="Отложен",
+        text="Текст",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    hidden = mixer.blend("blog.Category", is_published=False)
+    for url in (
+        reverse("blog:post_detail", args=(post.pk,)),
+        reverse("blog:category_posts", args=(hidden.slug,)),
+    ):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@async_to_sync
+async def _raw_asgi_get(url, query="", cookies=""):
+    """Запрос прямо в ASGIHandler: в отличие от AsyncClient, он читает
+    потоковый ответ в цикле событий, как настоящий сервер.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url,
+        "raw_path": url.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"cookie", cookies.encode())],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 40000),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await ASGIHandler()(scope, receive, send)
+    return messages[0]["status"], b"".join(
+        message.get("body", b"") for message in messages[1:])
+
+
+@pytest.mark.parametrize("url", [
+    "/export/posts/",
+    "/sitemap-posts-0.xml",
+    "/api/v1/posts/",
+])
+def test_streaming_responses_under_asgi(url, admin_client,
+                                        post_with_published_location,
+                                        settings, tmp_path):
+    settings.SITEMAP_CACHE_DIR = tmp_path
+    cookie = admin_client.cookies[settings.SESSION_COOKIE_NAME]
+    status, body = _raw_asgi_get(
+        url, cookies=f"{cookie.key}={cookie.value}")
+    assert status == HTTPStatus.OK, (
+        f"Убедитесь, что `{url}` отдаётся под ASGI: тело ответа не должно "
+        "читать базу в цикле событий."
+    )
+    assert str(post_with_published_location.pk).encode() in body
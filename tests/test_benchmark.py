@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from blog.benchmark import (
+    SCENARIOS,
+    BenchmarkRunner,
+    compare,
+    load_results,
+    save_results,
+)
+from blog.datagen import BlogDataGenerator
+
+pytestmark = [pytest.mark.django_db]
+
+# Полный замер: BLOGICUM_BENCHMARK_BASELINE=путь/к/baseline.json pytest ...
+BASELINE = os.environ.get("BLOGICUM_BENCHMARK_BASELINE")
+
+
+def _metrics(p50=10.0, queries=5, peak=100.0):
+    return {"p50_ms": p50, "queries": queries, "peak_kib": peak}
+
+
+def test_compare_flags_regressions():
+    baseline = {"index": _metrics(), "gone": _metrics()}
+    assert compare({"index": _metrics(p50=12.0)}, baseline) == []
+    regressions = compare(
+        {"index": _metrics(p50=30.0, queries=6, peak=200.0)}, baseline)
+    assert len(regressions) == 3, (
+        "Убедитесь, что рост задержки, числа запросов и памяти "
+        "считается регрессией."
+    )
+
+
+def test_results_roundtrip(tmp_path):
+    path = tmp_path / "results.json"
+    save_results(path, {"index": _metrics()}, {"seed": 1})
+    assert load_results(path) == {"index": _metrics()}
+
+
+def test_benchmark_smoke():
+    BlogDataGenerator(users=5, posts=60, comments=100, seed=3).generate()
+    results = BenchmarkRunner(iterations=2, warmup=0).run()
+    assert set(results) == {scenario.name for scenario in SCENARIOS}
+    assert results["index"]["queries"] > 0
+    assert results["index:anonymous"]["queries"] == 0, (
+        "Убедитесь, что повторный анонимный запрос ленты берётся из кеша."
+    )
+
+
+@pytest.mark.skipif(not BASELINE, reason="нужен BLOGICUM_BENCHMARK_BASELINE")
+def test_views_do_not_regress():
+    BlogDataGenerator(users=200, posts=20000, comments=100000).generate()
+    results = BenchmarkRunner().run()
+    regressions = compare(results, load_results(BASELINE))
+    assert not regressions, "\n".join(regressions)
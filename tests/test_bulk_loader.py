@@ -0,0 +1,86 @@
+import io
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+
+from blog.loader import iter_fixture
+from blog.models import Comment, FeedEntry, Post
+from blog.search import get_search_backend
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = [
+    {"model": "blog.comment", "pk": 1, "fields": {
+        "text": "Первый комментарий", "post": 1, "author": 7,
+        "created_at": "2023-01-02T10:00:00Z"}},
+    {"model": "blog.post", "pk": 1, "fields": {
+        "title": "Загруженный пост", "text": "Текст [с] {скобками}",
+        "pub_date": "2023-01-01T10:00:00Z", "author": 7, "category": 3,
+        "is_published": True, "created_at": "2023-01-01T10:00:00Z"}},
+    {"model": "blog.category", "pk": 3, "fields": {
+        "title": "Категория", "slug": "loaded", "description": "-",
+        "is_published": True, "created_at": "2023-01-01T10:00:00Z"}},
+    {"model": "auth.group", "pk": 5, "fields": {
+        "name": "авторы", "permissions": []}},
+    {"model": "auth.user", "pk": 7, "fields": {
+        "username": "loader", "password": "!", "groups": [5],
+        "date_joined": "2023-01-01T10:00:00Z"}},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1024])
+def test_iter_fixture_formats(chunk_size):
+    array = json.dumps(FIXTURE, ensure_ascii=False, indent=2)
+    lines = "\n".join(json.dumps(obj, ensure_ascii=False) for obj in FIXTURE)
+    for text in (array, lines + "\n"):
+        assert list(iter_fixture(io.StringIO(text), chunk_size)) == FIXTURE, (
+            "Убедитесь, что фикстура читается по частям без потери объектов."
+        )
+
+
+def test_bulk_loaddata(tmp_path):
+    path = tmp_path / "fixture.json"
+    path.write_text(json.dumps(FIXTURE, ensure_ascii=False), "utf-8")
+    out = StringIO()
+    call_command("bulk_loaddata", str(path), "--batch-size", "2", stdout=out)
+
+    post = Post.objects.get()
+    assert post.author.username == "loader"
+    assert list(post.author.groups.all()) == list(Group.objects.all())
+    assert Comment.objects.get().post == post
+    assert post.comment_count == 1, (
+        "Убедитесь, что после загрузки пересчитываются счётчики комментариев."
+    )
+    assert FeedEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что после загрузки пересобирается витрина ленты."
+    )
+    assert get_search_backend().search("комментарий").count() == 1
+
+    # Повторная загрузка обновляет строки, а не дублирует их.
+    call_command("bulk_loaddata", str(path), stdout=out)
+    assert Post.objects.count() == 1
+    assert Comment.objects.count() == 1
+
+
+def test_bulk_loaddata_keeps_fixture_timestamps(tmp_path):
+    fixture = json.loads(json.dumps(FIXTURE))
+    fixture[1]["fields"]["updated_at"] = "2023-01-05T10:00:00Z"
+    path = tmp_path / "fixture.json"
+    path.write_text(json.dumps(fixture, ensure_ascii=False), "utf-8")
+
+    # Второй проход обновляет уже существующие строки.
+    for _ in range(2):
+        call_command("bulk_loaddata", str(path), "--skip-rebuild",
+                     stdout=StringIO())
+        post = Post.objects.get()
+        assert (post.created_at.isoformat(), post.updated_at.isoformat()) == (
+            "2023-01-01T10:00:00+00:00", "2023-01-05T10:00:00+00:00"), (
+            "Убедитесь, что загрузка сохраняет даты из фикстуры."
+        )
+        assert Comment.objects.get().created_at.isoformat() == (
+            "2023-01-02T10:00:00+00:00")
+        assert post.category.created_at.isoformat() == (
+            "2023-01-01T10:00:00+00:00")
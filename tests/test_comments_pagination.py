@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENTS_PER_PAGE = 50
+
+
+def _add_comments(post, authors, count):
+    Comment.objects.bulk_create(
+        Comment(post=post, author=authors[i % len(authors)],
+                text=f"Комментарий {i}")
+        for i in range(count)
+    )
+
+
+def _get(client, url, params=None):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, params or {})
+    return response, len(ctx.captured_queries)
+
+
+def test_comments_are_paginated_without_n_plus_one(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    authors = mixer.cycle(5).blend("auth.User")
+    url = f"/posts/{post.id}/"
+
+    _add_comments(post, authors, 3)
+    _, few_queries = _get(client, url)
+
+    _add_comments(post, authors, COMMENTS_PER_PAGE * 2 + 7)
+    response, many_queries = _get(client, url)
+
+    assert many_queries == few_queries, (
+        "Убедитесь, что авторы комментариев загружаются вместе с "
+        "комментариями, без отдельного запроса на каждый."
+    )
+    comments = response.context["comments"]
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        "Убедитесь, что комментарии на странице поста выводятся порциями."
+    )
+
+    seen = [c.id for c in comments]
+    while comments.has_next():
+        response, _ = _get(client, url, {"comments": comments.next_cursor})
+        comments = response.context["comments"]
+        seen.extend(c.id for c in comments)
+    assert seen == list(
+        Comment.objects.filter(post=post)
+        .order_by("created_at", "id").values_list("id", flat=True)
+    ), "Убедитесь, что листание комментариев не теряет и не повторяет их."
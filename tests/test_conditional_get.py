@@ -0,0 +1,140 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.fixture
+def page_urls(post_with_published_location):
+    post = post_with_published_location
+    return {
+        "index": reverse("blog:index"),
+        "category": reverse(
+            "blog:category_posts", args=(post.category.slug,)),
+        "profile": reverse("blog:profile", args=(post.author.username,)),
+        "post_detail": reverse("blog:post_detail", args=(post.pk,)),
+    }
+
+
+@pytest.mark.parametrize("page", ["index", "category", "profile",
+                                  "post_detail"])
+def test_unchanged_page_is_not_modified(client, page_urls, page):
+    url = page_urls[page]
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"].startswith('W/"')
+
+    repeated = _revalidate(client, url, response)
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+        f"Убедитесь, что страница `{url}` отвечает 304 на If-None-Match, "
+        "если ничего не изменилось."
+    )
+    assert not repeated.content
+
+
+@pytest.mark.parametrize("page", ["index", "category", "profile",
+                                  "post_detail"])
+def test_new_comment_changes_validators(client, page_urls, page,
+                                        post_with_published_location):
+    url = page_urls[page]
+    response = client.get(url)
+    Comment.objects.create(
+        post=post_with_published_location,
+        author=post_with_published_location.author,
+        text="Новый комментарий",
+    )
+    assert _revalidate(client, url, response).status_code == HTTPStatus.OK
+
+
+def test_comment_edit_changes_post_validators(
+        client, page_urls, post_with_published_location):
+    comment = Comment.objects.create(
+        post=post_with_published_location,
+        author=post_with_published_location.author,
+        text="Первый вариант",
+    )
+    url = page_urls["post_detail"]
+    response = client.get(url)
+    comment.text = "Второй вариант"
+    comment.save()
+    assert _revalidate(client, url, response).status_code == HTTPStatus.OK
+
+
+def test_post_detail_supports_last_modified(
+        client, page_urls, post_with_published_location):
+    url = page_urls["post_detail"]
+    response = client.get(url)
+    assert "Last-Modified" in response
+    repeated = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_validators_differ_per_user(client, user_client, page_urls):
+    url = page_urls["index"]
+    anonymous = client.get(url)
+    logged_in = user_client.get(url)
+    assert anonymous["ETag"] != logged_in["ETag"], (
+        "Убедитесь, что ETag учитывает пользователя: страницы у "
+        "анонима и автора разные."
+    )
+    assert _revalidate(
+        user_client, url, anonymous).status_code == HTTPStatus.OK
+
+
+def test_scheduled_post_changes_validators(client, page_urls,
+                                           post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() + timedelta(minutes=5))
+    post.refresh_from_db()
+    post.save()
+    responses = {
+        name: client.get(page_urls[name])
+        for name in ("index", "category", "profile")
+    }
+
+    later = timezone.now() + timedelta(minutes=10)
+    # Страницы ждут ближайшей публикации сами, без планировщика.
+    for name in ("index", "category", "profile"):
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(timezone, "now", lambda: later)
+            assert _revalidate(
+                client, page_urls[name], responses[name],
+            ).status_code == HTTPStatus.OK, (
+                f"Убедитесь, что ETag страницы `{name}` меняется, когда "
+                "выходит отложенный пост."
+            )
+
+
+def test_category_visibility_changes_profile_validators(
+        client, page_urls, post_with_published_location):
+    url = page_urls["profile"]
+    response = client.get(url)
+    category = post_with_published_location.category
+    category.is_published = False
+    category.save()
+    assert _revalidate(client, url, response).status_code == HTTPStatus.OK, (
+        "Убедитесь, что снятие категории с публикации меняет ETag "
+        "профилей авторов её постов."
+    )
+
+
+def test_hidden_post_is_not_revalidated(client, page_urls,
+                                        post_with_published_location):
+    url = page_urls["post_detail"]
+    response = client.get(url)
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        is_published=False)
+    assert _revalidate(
+        client, url, response).status_code == HTTPStatus.NOT_FOUND
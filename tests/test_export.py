@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def export_posts(mixer, user, another_user, published_category):
+    start = timezone.make_aware(datetime(2023, 3, 1, 12))
+    return [
+        mixer.blend(
+            "blog.Post",
+            author=user if i % 2 else another_user,
+            category=published_category,
+            pub_date=start + timedelta(days=i),
+            text=f"Строка, с запятой и \"кавычками\" {i}",
+        )
+        for i in range(5)
+    ]
+
+
+def test_export_command_jsonl(export_posts, user):
+    out = StringIO()
+    call_command(
+        "export_posts", "--since", "2023-03-02", "--until", "2023-03-04",
+        "--author", user.username, stdout=out,
+    )
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    expected = [post for post in export_posts[1:4] if post.author == user]
+    assert [row["id"] for row in rows] == [post.id for post in expected], (
+        "Убедитесь, что выгрузка учитывает фильтры по датам и автору."
+    )
+    assert rows[0]["author"] == user.username
+    assert rows[0]["category"] == expected[0].category.slug
+    assert rows[0]["comment_count"] == 0
+
+
+def test_export_view_streams_csv(admin_client, export_posts):
+    response = admin_client.get("/export/posts/", {"format": "csv"})
+    assert response.status_code == 200
+    assert response.streaming, (
+        "Убедитесь, что выгрузка отдаётся через StreamingHttpResponse."
+    )
+    content = b"".join(response.streaming_content).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [int(row["id"]) for row in rows] == [p.id for p in export_posts]
+    assert rows[0]["text"] == export_posts[0].text
+
+
+def test_export_view_is_staff_only(user_client, export_posts):
+    response = user_client.get("/export/posts/")
+    assert response.status_code == 302, (
+        "Убедитесь, что выгрузка доступна только персоналу сайта."
+    )
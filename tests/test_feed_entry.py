@@ -0,0 +1,71 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import FeedEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _feed_ids():
+    return set(FeedEntry.objects.values_list("post_id", flat=True))
+
+
+def test_feed_entry_follows_post_and_category(post_with_published_location):
+    post = post_with_published_location
+    assert _feed_ids() == {post.id}, (
+        "Убедитесь, что опубликованный пост попадает в витрину ленты."
+    )
+
+    post.is_published = False
+    post.save()
+    assert _feed_ids() == set(), (
+        "Убедитесь, что снятый с публикации пост убирается из витрины."
+    )
+
+    post.is_published = True
+    post.save()
+    post.category.is_published = False
+    post.category.save()
+    assert _feed_ids() == set(), (
+        "Убедитесь, что посты скрытой категории убираются из витрины."
+    )
+
+    post.category.is_published = True
+    post.category.save()
+    assert _feed_ids() == {post.id}, (
+        "Убедитесь, что при публикации категории её посты возвращаются "
+        "в витрину."
+    )
+
+
+def test_scheduled_post_waits_in_feed(user_client, mixer, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert post.id in _feed_ids()
+    assert not list(user_client.get("/").context["page_obj"])
+
+    FeedEntry.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    assert [p.id for p in user_client.get("/").context["page_obj"]] == [
+        post.id
+    ], "Убедитесь, что главная страница читает ленту из витрины."
+
+
+def test_rebuild_feed_command(post_with_published_location):
+    post = post_with_published_location
+    FeedEntry.objects.all().delete()
+
+    out = StringIO()
+    call_command("rebuild_feed", stdout=out)
+
+    assert _feed_ids() == {post.id}
+    assert "В ленте публикаций: 1." in out.getvalue()
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import feeds
+from core.queries import QueryCounter
+
+pytestmark = [pytest.mark.django_db]
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _atom_titles(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("application/atom+xml")
+    root = ElementTree.fromstring(response.content)
+    return [entry.find(ATOM + "title").text
+            for entry in root.iter(ATOM + "entry")]
+
+
+def _counted_get(client, url):
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        response = client.get(url)
+    return response, counter.count
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    return {
+        "site": reverse("blog:site_feed", args=("atom",)),
+        "category": reverse(
+            "blog:category_feed", args=(published_category.slug, "atom")),
+        "author": reverse(
+            "blog:author_feed", args=(user.username, "atom")),
+    }
+
+
+@pytest.mark.parametrize("feed", ["site", "category", "author"])
+def test_feeds_follow_visibility_rules(client, feed_urls, feed, user,
+                                       published_category, make_post):
+    make_post(user, published_category, "Вышел")
+    make_post(user, published_category, "Снят", is_published=False)
+    make_post(user, published_category, "Отложен", minutes_ago=-60)
+
+    assert _atom_titles(client, feed_urls[feed]) == ["Вышел"], (
+        "Убедитесь, что в ленты попадают только видимые публикации."
+    )
+
+
+def test_rss_feed(client, user, published_category, make_post):
+    make_post(user, published_category, "Вышел")
+    response = client.get(reverse("blog:site_feed", args=("rss",)))
+    assert response["Content-Type"].startswith("application/rss+xml")
+    root = ElementTree.fromstring(response.content)
+    assert [item.find("title").text for item in root.iter("item")] == [
+        "Вышел"]
+
+
+def test_unknown_format_and_hidden_category(client, mixer, user):
+    assert client.get("/feeds/json/").status_code == HTTPStatus.NOT_FOUND
+    hidden = mixer.blend("blog.Category", is_published=False)
+    url = reverse("blog:category_feed", args=(hidden.slug, "atom"))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_document_is_updated_incrementally(client, feed_urls, user,
+                                           published_category, make_post):
+    first = make_post(user, published_category, "Первый", minutes_ago=20)
+    assert _atom_titles(client, feed_urls["site"]) == ["Первый"]
+
+    _, queries = _counted_get(client, feed_urls["site"])
+    assert queries == 0, (
+        "Убедитесь, что лента отдаётся из кеша без запросов к БД."
+    )
+
+    second = make_post(user, published_category, "Второй")
+    first.title = "Первый, исправленный"
+    first.save()
+    _, queries = _counted_get(client, feed_urls["site"])
+    assert queries == 0, (
+        "Убедитесь, что документ ленты обновляется сигналами, а не "
+        "пересобирается при запросе."
+    )
+    assert _atom_titles(client, feed_urls["site"]) == [
+        "Второй", "Первый, исправленный"]
+
+    second.delete()
+    assert _atom_titles(client, feed_urls["site"]) == [
+        "Первый, исправленный"]
+
+
+def test_post_moves_between_category_feeds(client, user, published_category,
+                                           another_category, make_post):
+    post = make_post(user, published_category, "Переезд")
+    old_url = reverse(
+        "blog:category_feed", args=(published_category.slug, "atom"))
+    new_url = reverse(
+        "blog:category_feed", args=(another_category.slug, "atom"))
+    assert _atom_titles(client, old_url) == ["Переезд"]
+    assert _atom_titles(client, new_url) == []
+
+    post.category = another_category
+    post.save()
+    assert _atom_titles(client, old_url) == []
+    assert _atom_titles(client, new_url) == ["Переезд"]
+
+
+def test_full_document_is_rebuilt_after_removal(client, feed_urls, user,
+                                                published_category, make_post):
+    posts = [
+        make_post(user, published_category, f"Пост {i}", minutes_ago=100 - i)
+        for i in range(feeds.FEED_SIZE + 1)
+    ]
+    titles = _atom_titles(client, feed_urls["site"])
+    assert len(titles) == feeds.FEED_SIZE
+    assert "Пост 0" not in titles
+
+    posts[-1].delete()
+    titles = _atom_titles(client, feed_urls["site"])
+    assert len(titles) == feeds.FEED_SIZE
+    assert titles[-1] == "Пост 0", (
+        "Убедитесь, что после удаления из полной ленты её конец "
+        "дочитывается из базы."
+    )
+
+
+def test_scheduled_post_appears_when_published(client, feed_urls, user,
+                                               published_category, monkeypatch,
+                                               make_post):
+    make_post(user, published_category, "Сейчас")
+    make_post(user, published_category, "Позже", minutes_ago=-5)
+    assert _atom_titles(client, feed_urls["author"]) == ["Сейчас"]
+
+    later = timezone.now() + timedelta(minutes=10)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert _atom_titles(client, feed_urls["author"]) == ["Позже", "Сейчас"]
+
+
+def test_feed_conditional_get(client, feed_urls, user, published_category,
+                              make_post):
+    post = make_post(user, published_category, "Вышел")
+    response = client.get(feed_urls["site"])
+    assert "Last-Modified" in response
+
+    repeated = client.get(
+        feed_urls["site"], HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+    post.title = "Исправлен"
+    post.save()
+    changed = client.get(
+        feed_urls["site"], HTTP_IF_NONE_MATCH=response["ETag"])
+    assert changed.status_code == HTTPStatus.OK
+
+
+def test_last_modified_advances_after_removal(client, feed_urls, user,
+                                              published_category, monkeypatch,
+                                              make_post):
+    make_post(user, published_category, "Новый")
+    older = make_post(user, published_category, "Старый", minutes_ago=20)
+    response = client.get(feed_urls["site"])
+    assert response.status_code == HTTPStatus.OK
+
+    # Last-Modified точен до секунды: удаление происходит «позже».
+    later = timezone.now() + timedelta(seconds=5)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    older.delete()
+    changed = client.get(
+        feed_urls["site"], HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert changed.status_code == HTTPStatus.OK, (
+        "Убедитесь, что удаление поста сдвигает Last-Modified ленты."
+    )
+    assert _atom_titles(client, feed_urls["site"]) == ["Новый"]
@@ -0,0 +1,68 @@
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.datagen import BlogDataGenerator
+from blog.models import Category, Comment, FeedEntry, Location, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _generate(now, seed=7):
+    BlogDataGenerator(
+        users=20, categories=5, locations=10, posts=400, comments=800,
+        seed=seed, batch_size=150, future_ratio=0.1,
+        unpublished_ratio=0.1, now=now,
+    ).generate()
+    return list(Post.objects.order_by("pk").values_list(
+        "pk", "title", "author_id", "category_id", "pub_date",
+        "comment_count",
+    ))
+
+
+def _clear():
+    for model in (Comment, Post, Category, Location, User):
+        model.objects.all().delete()
+
+
+def test_generator_is_deterministic():
+    now = timezone.now()
+    first = _generate(now)
+    _clear()
+    assert _generate(now) == first, (
+        "Убедитесь, что одинаковый seed даёт одинаковые данные."
+    )
+    _clear()
+    assert _generate(now, seed=8) != first
+
+
+def test_generated_data_shape():
+    now = timezone.now()
+    _generate(now)
+    posts = Post.objects.all()
+    assert posts.filter(pub_date__gt=now).exists()
+    assert posts.filter(is_published=False).exists()
+    authors = Counter(posts.values_list("author_id", flat=True))
+    top_count = authors.most_common(1)[0][1]
+    assert top_count > 3 * min(authors.values()), (
+        "Убедитесь, что распределение постов по авторам неравномерное."
+    )
+    assert Comment.objects.count() == 800
+    assert not Comment.objects.filter(post__pub_date__gt=now).exists()
+    assert sum(posts.values_list("comment_count", flat=True)) == 800
+    assert FeedEntry.objects.count() == posts.filter(
+        is_published=True, category__is_published=True,
+    ).count()
+
+
+def test_generate_blog_data_command():
+    out = StringIO()
+    call_command(
+        "generate_blog_data", "--users", "3", "--posts", "10",
+        "--comments", "5", stdout=out,
+    )
+    assert Post.objects.count() == 10
+    assert "posts: 10" in out.getvalue()
@@ -0,0 +1,93 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from PIL import Image
+
+from blog.images import process_post_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_large_image(mixer, user, published_category):
+    img = Image.new("RGB", (1200, 900), color=(73, 109, 137))
+    img_io = BytesIO()
+    img.save(img_io, format="JPEG")
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        image=ImageFile(img_io, name="large_image.jpg"),
+    )
+
+
+def test_variants_scheduled_after_commit(
+        mixer, user, published_category, django_capture_on_commit_callbacks):
+    img_io = BytesIO()
+    Image.new("RGB", (10, 10)).save(img_io, format="JPEG")
+    with django_capture_on_commit_callbacks() as callbacks:
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            image=ImageFile(img_io, name="small.jpg"),
+        )
+    assert len(callbacks) == 1, (
+        "Убедитесь, что уменьшенные копии строятся после фиксации "
+        "транзакции, а не во время запроса."
+    )
+
+
+def test_feed_falls_back_to_original(client, post_with_large_image):
+    content = client.get("/").content.decode("utf-8")
+    assert post_with_large_image.image.url in content
+    assert 'loading="lazy"' in content
+    assert "srcset" not in content, (
+        "Убедитесь, что пока копий нет, выводится оригинал без srcset."
+    )
+
+
+def test_feed_uses_variants(client, post_with_large_image):
+    post = post_with_large_image
+    variants = process_post_image(post.pk, post.image.name)
+    assert [size["width"] for size in variants["sizes"]] == [320, 800]
+
+    post.refresh_from_db()
+    assert post.image_variants == variants
+
+    content = client.get("/").content.decode("utf-8")
+    thumb = variants["sizes"][0]
+    url = post.image.storage.url
+    assert f'srcset="{url(thumb["jpeg"])} 320w"' in content, (
+        "Убедитесь, что в ленте используется миниатюра изображения."
+    )
+    assert f'{url(thumb["webp"])} 320w' in content
+
+    content = client.get(f"/posts/{post.pk}/").content.decode("utf-8")
+    assert "800w" in content, (
+        "Убедитесь, что на странице поста доступна средняя копия."
+    )
+
+
+def test_variants_change_profile_validators(client, post_with_large_image):
+    post = post_with_large_image
+    url = f"/profile/{post.author.username}/"
+    response = client.get(url)
+    process_post_image(post.pk, post.image.name)
+    repeated = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == 200, (
+        "Убедитесь, что готовые копии сбрасывают страницу профиля автора."
+    )
+    assert "320w" in repeated.content.decode("utf-8")
+
+
+def test_new_image_resets_variants(post_with_large_image):
+    post = post_with_large_image
+    process_post_image(post.pk, post.image.name)
+    post.refresh_from_db()
+    img_io = BytesIO()
+    Image.new("RGB", (400, 300)).save(img_io, format="JPEG")
+    post.image = ImageFile(img_io, name="replacement.jpg")
+    post.save()
+    post.refresh_from_db()
+    assert post.image_variants == {}
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+N_POSTS = 300
+
+
+@pytest.fixture
+def feed_data(mixer, user, another_user):
+    categories = mixer.cycle(3).blend("blog.Category", is_published=True)
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            title=f"Пост {i}",
+            text="Текст",
+            pub_date=now - timedelta(minutes=i),
+            author=user if i % 5 else another_user,
+            category=categories[i % len(categories)],
+            is_published=bool(i % 7),
+        )
+        for i in range(N_POSTS)
+    )
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=user, text=f"Комментарий {i}")
+        for i in range(50)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+        if connection.vendor == "postgresql":
+            # На маленьких таблицах PostgreSQL предпочтёт seq scan.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return categories, post
+
+
+def test_feed_uses_partial_index(feed_data):
+    now = timezone.now()
+    plan = (
+        Post.objects.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=now,
+        ).order_by("-pub_date", "-id")[:11]
+    ).explain()
+    assert "post_feed_idx" in plan, plan
+
+
+def test_category_feed_uses_index(feed_data):
+    categories, _ = feed_data
+    plan = (
+        Post.objects.filter(
+            is_published=True,
+            category=categories[0],
+            pub_date__lte=timezone.now(),
+        ).order_by("-pub_date", "-id")[:11]
+    ).explain()
+    assert "post_category_feed_idx" in plan, plan
+
+
+def test_profile_uses_author_index(feed_data, user):
+    plan = (
+        Post.objects.filter(author=user).order_by("-pub_date", "-id")[:11]
+    ).explain()
+    assert "post_author_feed_idx" in plan, plan
+
+
+def test_comments_use_post_created_index(feed_data):
+    _, post = feed_data
+    plan = (
+        Comment.objects.filter(post=post).order_by("created_at", "id")[:50]
+    ).explain()
+    assert "comment_post_created_idx" in plan, plan
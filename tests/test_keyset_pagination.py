@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_posts_same_dates(mixer, user, published_category):
+    # Половина постов делит одну дату: проверяем доп. сортировку по id.
+    now = timezone.now() - timedelta(days=1)
+    dates = (now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 3))
+    return mixer.cycle(N_PER_PAGE * 3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=dates,
+    )
+
+
+def _walk(client, url, cursor_key):
+    seen = []
+    cursor = None
+    for _ in range(10):
+        response = client.get(url, {"cursor": cursor} if cursor else {})
+        page_obj = response.context["page_obj"]
+        seen.extend(post.id for post in page_obj)
+        cursor = getattr(page_obj, cursor_key)
+        if not cursor:
+            break
+    return seen
+
+
+def test_keyset_walks_all_posts_once(user_client, many_posts_same_dates):
+    expected = [
+        post.id for post in sorted(
+            many_posts_same_dates,
+            key=lambda post: (post.pub_date, post.id),
+            reverse=True,
+        )
+    ]
+    for url in ("/", f"/category/{many_posts_same_dates[0].category.slug}/"):
+        assert _walk(user_client, url, "next_cursor") == expected, (
+            "Убедитесь, что при переходе по курсорам пагинации каждая "
+            "публикация ленты показывается ровно один раз и по порядку."
+        )
+
+
+def test_keyset_last_and_previous(user_client, many_posts_same_dates):
+    response = user_client.get("/", {"cursor": "last"})
+    last_page = response.context["page_obj"]
+    assert len(last_page) == N_PER_PAGE
+    assert last_page.has_previous() and not last_page.has_next()
+
+    response = user_client.get("/", {"cursor": last_page.previous_cursor})
+    middle_page = response.context["page_obj"]
+    assert middle_page.has_previous() and middle_page.has_next()
+
+    response = user_client.get("/", {"cursor": middle_page.next_cursor})
+    assert [p.id for p in response.context["page_obj"]] == [
+        p.id for p in last_page
+    ], "Убедитесь, что курсоры «назад» и «вперёд» согласованы."
+
+
+def test_keyset_broken_cursor_is_first_page(
+        user_client, many_posts_same_dates):
+    first = user_client.get("/").context["page_obj"]
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 200
+    assert [p.id for p in response.context["page_obj"]] == [
+        p.id for p in first
+    ]
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+
+from blog.loadtest import ThreadPoolWSGIServer, run_load, slow_request
+
+
+def _app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"x" * 20000]
+
+
+@pytest.fixture
+def wsgi_server():
+    server = ThreadPoolWSGIServer(("127.0.0.1", 0), threads=2)
+    server.set_app(_app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+    server.pool.shutdown()
+
+
+def test_slow_clients_load(wsgi_server):
+    host, port = wsgi_server
+    status, seconds = asyncio.run(
+        slow_request(host, port, "/", send_delay=0.01, read_delay=0))
+    assert status == 200 and seconds >= 0.05
+
+    summary = asyncio.run(run_load(
+        host, port, ["/", "/other/"], clients=5, duration=0.3,
+        send_delay=0.01, read_delay=0.001,
+    ))
+    assert summary["requests"] > 0 and summary["errors"] == 0
+    assert summary["p50_ms"] <= summary["p99_ms"], (
+        "Убедитесь, что сводка замера содержит перцентили задержки."
+    )
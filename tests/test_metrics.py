@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from core.metrics import (
+    Registry,
+    flush,
+    merge,
+    registry,
+    render_prometheus,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(settings):
+    settings.METRICS_DIR = None
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def _sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"Нет строки {line_start!r} в выводе /metrics")
+
+
+def test_metrics_endpoint_reports_views(client, post_with_published_location):
+    client.get(reverse("blog:index"))
+    client.get(reverse("blog:index"))
+    client.get(reverse(
+        "blog:post_detail", args=(post_with_published_location.pk,)))
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.content.decode()
+    assert _sample(
+        text,
+        'blogicum_requests_total{method="GET",status="200",'
+        'view="blog:index"}',
+    ) == 2
+    assert _sample(
+        text,
+        'blogicum_request_duration_seconds_count{view="blog:index"}',
+    ) == 2
+    assert _sample(
+        text,
+        'blogicum_db_queries_bucket{le="+Inf",view="blog:post_detail"}',
+    ) == 1
+    assert _sample(
+        text, 'blogicum_db_queries_sum{view="blog:post_detail"}') > 0, (
+        "Убедитесь, что SQL-запросы считаются по имени маршрута."
+    )
+    assert _sample(
+        text, 'blogicum_template_render_seconds_sum{view="blog:index"}') > 0
+    assert "/posts/" not in text, (
+        "Убедитесь, что метка view — имя маршрута, а не путь запроса."
+    )
+
+
+def test_page_cache_hits_are_counted(client):
+    client.get(reverse("blog:index"))
+    client.get(reverse("blog:index"))
+    text = client.get("/metrics").content.decode()
+    assert _sample(
+        text, 'blogicum_cache_requests_total{cache="page",result="hit"}'
+    ) == 1
+    assert _sample(
+        text, 'blogicum_cache_requests_total{cache="page",result="miss"}'
+    ) == 1
+
+
+def test_metrics_endpoint_is_restricted(client, settings):
+    settings.METRICS_ALLOWED_IPS = ["10.0.0.1"]
+    assert client.get("/metrics").status_code == 403
+
+
+def test_processes_are_merged(client, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    other = Registry()
+    other.inc("blogicum_requests_total", {"view": "blog:index"}, 5)
+    other.observe(
+        "blogicum_request_duration_seconds", {"view": "blog:index"}, 0.2)
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+
+    registry.inc("blogicum_requests_total", {"view": "blog:index"}, 2)
+    registry.observe(
+        "blogicum_request_duration_seconds", {"view": "blog:index"}, 0.001)
+    flush()
+    # Свой файл не должен учитываться дважды вместе с живыми данными.
+    text = client.get("/metrics").content.decode()
+    assert _sample(
+        text, 'blogicum_requests_total{view="blog:index"}') == 7
+    assert _sample(
+        text,
+        'blogicum_request_duration_seconds_bucket{le="0.005",'
+        'view="blog:index"}',
+    ) == 1
+    assert _sample(
+        text,
+        'blogicum_request_duration_seconds_bucket{le="0.25",'
+        'view="blog:index"}',
+    ) == 2
+
+
+def test_render_escapes_label_values():
+    snapshot = merge([{
+        "counters": [{
+            "name": "blogicum_requests_total",
+            "labels": {"view": 'a"b\\c'},
+            "value": 1,
+        }],
+        "histograms": [],
+    }])
+    assert 'view="a\\"b\\\\c"' in render_prometheus(snapshot)
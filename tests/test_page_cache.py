@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.cache import seconds_until_next_publication
+from core.cache import cache_page_for_anonymous
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_feed_served_from_cache(
+        client, django_assert_num_queries, post_with_published_location):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/"
+    for page_url in ("/", url, "/pages/about/", "/pages/rules/"):
+        client.get(page_url)
+        with django_assert_num_queries(0):
+            response = client.get(page_url)
+        assert response.status_code == 200, (
+            "Убедитесь, что повторный анонимный запрос страницы "
+            f"{page_url} отдаётся из кеша без запросов к БД."
+        )
+
+
+def test_anonymous_feed_purged_on_change(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/"
+    client.get("/")
+    client.get(url)
+
+    post.title = "Обновлённый заголовок"
+    post.save()
+    for page_url in ("/", url):
+        assert "Обновлённый заголовок" in client.get(page_url).content.decode(
+        ), "Убедитесь, что изменение поста сбрасывает кеш его лент."
+
+    mixer.blend("blog.Comment", post=post)
+    assert "Комментарии (1)" in client.get(url).content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кеш ленты."
+    )
+
+
+def test_logged_in_feed_not_cached(user_client, post_with_published_location):
+    user_client.get("/")
+    response = user_client.get("/")
+    assert response.context is not None, (
+        "Убедитесь, что страницы авторизованных пользователей не кешируются."
+    )
+
+
+def test_cache_expires_at_scheduled_publication(
+        mixer, published_category, settings):
+    settings.ANONYMOUS_PAGE_CACHE_TIMEOUT = 3600
+    mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=90),
+    )
+    assert seconds_until_next_publication() <= 90
+    assert seconds_until_next_publication(published_category.slug) <= 90
+    assert seconds_until_next_publication("no-such-category") == 3600
+
+
+def test_cached_response_keeps_view_headers():
+    @cache_page_for_anonymous()
+    def view(request):
+        response = HttpResponse("тело", content_type="text/plain")
+        response["Content-Language"] = "ru"
+        response["X-Robots-Tag"] = "noindex"
+        return response
+
+    request = RequestFactory().get("/headers/")
+    request.user = AnonymousUser()
+    first = view(request)
+    cached = view(request)
+    assert cached is not first
+    assert cached.content == first.content
+    for header in ("Content-Type", "Content-Language", "X-Robots-Tag"):
+        assert cached[header] == first[header], (
+            "Убедитесь, что ответ из кеша сохраняет заголовки, которые "
+            f"выставило представление: {header}."
+        )
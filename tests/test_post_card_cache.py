@@ -0,0 +1,43 @@
+import pytest
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _index(client):
+    return client.get("/").content.decode("utf-8")
+
+
+def test_card_is_cached(user_client, post_with_published_location):
+    post = post_with_published_location
+    assert post.title in _index(user_client)
+    # UPDATE в обход save() не меняет updated_at — карточка берётся из кеша.
+    Post.objects.filter(pk=post.pk).update(title="Изменено втихую")
+    assert post.title in _index(user_client), (
+        "Убедитесь, что карточки публикаций кешируются."
+    )
+
+
+def test_card_invalidated_by_related_changes(
+        mixer, user_client, post_with_published_location):
+    post = post_with_published_location
+    _index(user_client)
+
+    post.category.title = "Новое название категории"
+    post.category.save()
+    assert "Новое название категории" in _index(user_client), (
+        "Убедитесь, что кеш карточки сбрасывается при изменении категории."
+    )
+
+    post.location.name = "Новое место"
+    post.location.save()
+    assert "Новое место" in _index(user_client), (
+        "Убедитесь, что кеш карточки сбрасывается при изменении "
+        "местоположения."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    assert "Комментарии (1)" in _index(user_client), (
+        "Убедитесь, что кеш карточки сбрасывается при добавлении комментария."
+    )
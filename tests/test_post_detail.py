@@ -0,0 +1,45 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_can_read_published_post(
+        client, post_with_published_location):
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что опубликованный пост доступен анонимному посетителю."
+    )
+
+
+@pytest.mark.parametrize("change", [
+    {"is_published": False},
+    {"pub_date": timezone.now() + timedelta(days=1)},
+])
+def test_hidden_post_visible_only_to_author(
+        user_client, another_user_client, client,
+        post_with_published_location, change):
+    post = post_with_published_location
+    for field, value in change.items():
+        setattr(post, field, value)
+    post.save()
+    url = f"/posts/{post.id}/"
+
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит свой скрытый или отложенный пост."
+    )
+    for other in (another_user_client, client):
+        assert other.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            "Убедитесь, что скрытый или отложенный пост недоступен "
+            "другим пользователям."
+        )
+
+
+def test_post_detail_fetches_post_once(
+        client, django_assert_num_queries, post_with_published_location):
+    # Пост с авторами/категорией/местом одним JOIN и список комментариев.
+    with django_assert_num_queries(2):
+        client.get(f"/posts/{post_with_published_location.id}/")
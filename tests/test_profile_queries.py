@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+LARGE_AUTHOR_POSTS = 2000
+MAX_PROFILE_SECONDS = 1.0
+
+
+def _make_posts(author, category, count):
+    now = timezone.now()
+    Post.objects.bulk_create(
+        (
+            Post(
+                title=f"Пост {i}",
+                text="Текст публикации",
+                author=author,
+                category=category,
+                is_published=bool(i % 4),
+                pub_date=now + timedelta(hours=1 - i),
+            )
+            for i in range(count)
+        ),
+        batch_size=500,
+    )
+    FeedEntry.fill(Post.objects.filter(author=author))
+
+
+def _profile_queries(client, username):
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        response = client.get(f"/profile/{username}/")
+        elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries), elapsed
+
+
+@pytest.mark.parametrize("viewer", ["user_client", "another_user_client"])
+def test_profile_query_count_independent_of_author_size(
+        request, viewer, user, published_category):
+    client = request.getfixturevalue(viewer)
+
+    _make_posts(user, published_category, 15)
+    # Первый запрос заполняет кеш очереди публикаций.
+    _profile_queries(client, user.username)
+    _, small_queries, _ = _profile_queries(client, user.username)
+
+    _make_posts(user, published_category, LARGE_AUTHOR_POSTS)
+    response, large_queries, elapsed = _profile_queries(
+        client, user.username)
+
+    assert large_queries == small_queries, (
+        "Убедитесь, что число запросов страницы профиля не зависит от "
+        "количества публикаций автора."
+    )
+    assert large_queries <= 5, (
+        "Убедитесь, что страница профиля ищет пользователя один раз и "
+        "загружает публикации одним запросом."
+    )
+    assert elapsed < MAX_PROFILE_SECONDS, (
+        f"Страница профиля крупного автора строилась {elapsed:.2f} с."
+    )
+    assert len(response.context["page_obj"]) == 10
+
+
+def test_profile_hides_unpublished_from_others(
+        user_client, another_user_client, user, published_category):
+    _make_posts(user, published_category, 8)
+    own = user_client.get(f"/profile/{user.username}/").context["page_obj"]
+    other = another_user_client.get(
+        f"/profile/{user.username}/").context["page_obj"]
+
+    assert len(own) == 8, (
+        "Убедитесь, что автор видит в профиле все свои публикации."
+    )
+    now = timezone.now()
+    assert all(p.is_published and p.pub_date <= now for p in other), (
+        "Убедитесь, что другие пользователи не видят в профиле автора "
+        "снятые с публикации и отложенные посты."
+    )
+    assert len(other) == Post.objects.filter(
+        author=user, is_published=True, pub_date__lte=now).count()
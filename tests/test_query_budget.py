@@ -0,0 +1,132 @@
+import logging
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import path, reverse
+
+from blog.datagen import BlogDataGenerator
+from blog.models import Comment, Post
+from core.queries import QueryBudgetExceeded, QueryCounter, query_budget
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count(client, url, method="get", data=None):
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        response = getattr(client, method)(url, data)
+    assert response.status_code in (200, 302), url
+    return counter.count
+
+
+def _read_urls(post):
+    return {
+        "index": reverse("blog:index"),
+        "category_posts": reverse(
+            "blog:category_posts", args=(post.category.slug,)),
+        "post_detail": reverse("blog:post_detail", args=(post.pk,)),
+        "profile": reverse("blog:profile", args=(post.author.username,)),
+        "search": reverse("blog:search") + "?q=день",
+    }
+
+
+def _measure(client, post):
+    client.force_login(post.author)
+    own = {name: _count(client, url) for name, url in _read_urls(post).items()}
+    client.logout()
+    client.force_login(Comment.objects.exclude(
+        author=post.author).first().author)
+    other = {name: _count(client, url) for name, url in _read_urls(post).items()}
+    return own, other
+
+
+def test_query_count_does_not_grow_with_data(client):
+    BlogDataGenerator(users=3, posts=3, comments=3, seed=1).generate()
+    small = _measure(client, Post.objects.order_by("-comment_count").first())
+
+    BlogDataGenerator(users=5, posts=60, comments=400, seed=2).generate()
+    large = _measure(client, Post.objects.order_by("-comment_count").first())
+
+    assert small == large, (
+        "Убедитесь, что число SQL-запросов страниц не зависит от числа "
+        "постов и комментариев."
+    )
+
+
+def test_delete_post_is_not_n_plus_one(client):
+    BlogDataGenerator(users=3, posts=2, comments=0, seed=1).generate()
+    few, many = Post.objects.order_by("pk")[:2]
+    Comment.objects.create(post=few, author=few.author, text="Один")
+    Comment.objects.bulk_create(
+        Comment(post=many, author=many.author, text="Много")
+        for _ in range(50)
+    )
+    Post.recount_comments()
+
+    counts = []
+    for post in (few, many):
+        client.force_login(post.author)
+        counts.append(_count(
+            client, reverse("blog:delete_post", args=(post.pk,)), "post"))
+    assert counts[0] == counts[1], (
+        "Убедитесь, что удаление поста не выполняет запросы на каждый "
+        "его комментарий."
+    )
+    assert not Comment.objects.exists()
+
+
+def _view_with_budget(limit):
+    @query_budget(limit)
+    def view(request):
+        list(Post.objects.all())
+        list(Post.objects.all())
+        return HttpResponse()
+    return view
+
+
+def _streaming_view_with_budget(limit):
+    @query_budget(limit)
+    def view(request):
+        list(Post.objects.all())
+
+        def rows():
+            yield b"head\n"
+            for post in Post.objects.all():
+                yield post.title.encode()
+        return StreamingHttpResponse(rows())
+    return view
+
+
+@pytest.fixture
+def budget_urls(settings):
+    class Urls:
+        urlpatterns = [
+            path("tight/", _view_with_budget(1)),
+            path("enough/", _view_with_budget(2)),
+            path("stream-tight/", _streaming_view_with_budget(1)),
+            path("stream-enough/", _streaming_view_with_budget(2)),
+        ]
+
+    settings.ROOT_URLCONF = Urls
+
+
+def test_middleware_raises_over_budget(client, budget_urls):
+    assert client.get("/enough/").status_code == 200
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/tight/")
+
+
+def test_middleware_counts_streamed_queries(client, budget_urls):
+    response = client.get("/stream-enough/")
+    assert b"".join(response.streaming_content) == b"head\n"
+    response = client.get("/stream-tight/")
+    with pytest.raises(QueryBudgetExceeded):
+        b"".join(response.streaming_content)
+
+
+def test_middleware_logs_over_budget(client, budget_urls, settings, caplog):
+    settings.QUERY_BUDGET_MODE = "log"
+    with caplog.at_level(logging.WARNING, logger="core.queries"):
+        assert client.get("/tight/").status_code == 200
+    assert "2 SQL-запросов при бюджете 1" in caplog.text
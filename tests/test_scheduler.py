@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from blog.cache import next_publication_time, seconds_until_next_publication
+from blog.scheduler import LAST_RUN_KEY, PublicationScheduler, scheduler
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, published_category):
+    return mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(minutes=5),
+    )
+
+
+def test_queue_exposes_next_publication(scheduled_post):
+    slug = scheduled_post.category.slug
+    assert next_publication_time() == scheduled_post.pub_date
+    assert next_publication_time(slug) == scheduled_post.pub_date
+    assert next_publication_time("other-category") is None
+    assert 0 < seconds_until_next_publication(slug) <= 5 * 60, (
+        "Убедитесь, что кеш ленты живёт не дольше выхода отложенного поста."
+    )
+
+
+def test_queue_reset_on_post_change(scheduled_post):
+    next_publication_time()
+    scheduled_post.pub_date += timedelta(minutes=5)
+    scheduled_post.save()
+    assert next_publication_time() == scheduled_post.pub_date
+
+
+@pytest.mark.parametrize("urlconf", ["blogicum.urls", "blogicum.asgi_urls"])
+def test_run_pending_invalidates_and_warms(
+        client, django_assert_num_queries, scheduled_post, settings, urlconf):
+    client.get("/")
+    cache.set(LAST_RUN_KEY, timezone.now())
+
+    # Под ASGI прогрев всё равно должен выполнить синхронные представления.
+    settings.ROOT_URLCONF = urlconf
+    slugs = PublicationScheduler().run_pending(
+        now=scheduled_post.pub_date + timedelta(seconds=1)
+    )
+    settings.ROOT_URLCONF = "blogicum.urls"
+
+    assert slugs == {scheduled_post.category.slug}
+    with django_assert_num_queries(0):
+        client.get(f"/category/{scheduled_post.category.slug}/")
+    with django_assert_num_queries(0):
+        client.get("/")
+
+
+def test_command_requires_shared_cache(settings, tmp_path, scheduled_post):
+    with pytest.raises(CommandError):
+        call_command("run_publication_scheduler", "--once")
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path),
+    }}
+    call_command("run_publication_scheduler", "--once")
+
+
+def test_scheduler_starts_in_process(settings, monkeypatch):
+    started = []
+    monkeypatch.setattr(scheduler, "start", lambda: started.append(True))
+    apps.get_app_config("blog").ready()
+    assert not started
+    settings.PUBLICATION_SCHEDULER_IN_PROCESS = True
+    apps.get_app_config("blog").ready()
+    assert started, (
+        "Убедитесь, что при PUBLICATION_SCHEDULER_IN_PROCESS планировщик "
+        "запускается вместе с приложением."
+    )
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.search import get_search_backend
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def search_posts(mixer, user, published_category):
+    now = timezone.now() - timedelta(days=1)
+    in_title = mixer.blend(
+        "blog.Post", title="Восхождение на Эльбрус", text="Горы.",
+        author=user, category=published_category, is_published=True,
+        pub_date=now,
+    )
+    in_text = mixer.blend(
+        "blog.Post", title="Поход", text="Видели Эльбрус издалека.",
+        author=user, category=published_category, is_published=True,
+        pub_date=now,
+    )
+    hidden = mixer.blend(
+        "blog.Post", title="Эльбрус зимой", text="Черновик.",
+        author=user, category=published_category, is_published=False,
+        pub_date=now,
+    )
+    scheduled = mixer.blend(
+        "blog.Post", title="Эльбрус летом", text="Скоро.",
+        author=user, category=published_category, is_published=True,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    return in_title, in_text, hidden, scheduled
+
+
+def _found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_title_and_hides_invisible(client, search_posts):
+    in_title, in_text, hidden, scheduled = search_posts
+    assert _found(client, "эльбрус") == [in_title.id, in_text.id], (
+        "Убедитесь, что поиск находит только видимые публикации, а "
+        "совпадение в заголовке ранжируется выше совпадения в тексте."
+    )
+
+
+def test_search_follows_changes(client, user, search_posts):
+    in_title, in_text, *_ = search_posts
+    assert _found(client, "палатка") == []
+
+    comment = in_text.comments.create(author=user, text="Забыли палатку")
+    assert _found(client, "палатк") == [in_text.id], (
+        "Убедитесь, что пост находится по тексту комментария."
+    )
+
+    comment.delete()
+    in_title.title = "Палатка на склоне"
+    in_title.save()
+    assert _found(client, "палатка") == [in_title.id], (
+        "Убедитесь, что индекс обновляется при изменении и удалении."
+    )
+
+    in_title.delete()
+    assert _found(client, "палатка") == []
+
+
+def test_search_query_is_not_fts_syntax(client, search_posts):
+    for query in ('"', "эльбрус OR", "NEAR(", "*", "-"):
+        _found(client, query)
+
+
+def test_admin_search_includes_hidden_posts(admin_client, search_posts):
+    response = admin_client.get("/admin/blog/post/", {"q": "эльбрус"})
+    found = {post.id for post in response.context["cl"].result_list}
+    assert found == {post.id for post in search_posts}
+
+
+def test_rebuild_restores_index(search_posts, user):
+    comment = search_posts[0].comments.create(author=user, text="Палатка")
+    backend = get_search_backend()
+    backend.clear()
+    assert backend.search("эльбрус").count() == 0
+    backend.rebuild()
+    assert backend.search("эльбрус").count() == 2
+    assert backend.search("палатка").count() == 1
+
+    comment.delete()
+    assert backend.search("палатка").count() == 0, (
+        "Убедитесь, что rowid строк после пересборки совпадают с "
+        "`post_rowid()`/`comment_rowid()`."
+    )
@@ -0,0 +1,174 @@
+import os
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import sitemaps
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def small_shards(settings, tmp_path, monkeypatch):
+    settings.SITEMAP_CACHE_DIR = tmp_path
+    monkeypatch.setattr(sitemaps, "SHARD_SIZE", 5)
+    monkeypatch.setattr(sitemaps, "BATCH_SIZE", 2)
+
+
+@pytest.fixture
+def make_posts(make_post):
+    def make_posts(author, category, count, **kwargs):
+        return [
+            make_post(author, category, f"Пост {i}", **kwargs)
+            for i in range(count)
+        ]
+
+    return make_posts
+
+
+def _locs(response):
+    content = b"".join(response.streaming_content).decode()
+    return re.findall(r"<loc>([^<]+)</loc>", content)
+
+
+def _shard(client, section, shard):
+    return client.get(reverse("blog:sitemap_shard", args=(section, shard)))
+
+
+def test_index_lists_id_range_shards(client, user, published_category,
+                                     make_posts):
+    make_posts(user, published_category, 12)
+    response = client.get(reverse("blog:sitemap"))
+    assert response.status_code == HTTPStatus.OK
+    locs = _locs(response)
+    assert [loc.rsplit("/", 1)[1] for loc in locs] == [
+        "sitemap-posts-0.xml",
+        "sitemap-posts-1.xml",
+        "sitemap-posts-2.xml",
+        "sitemap-categories-0.xml",
+        "sitemap-profiles-0.xml",
+    ]
+
+
+def test_shards_follow_visibility_rules(client, user, published_category,
+                                        another_user, make_posts):
+    posts = make_posts(user, published_category, 4)
+    Post.objects.filter(pk=posts[1].pk).update(is_published=False)
+    posts[1].refresh_from_db()
+    posts[1].save()
+    make_posts(another_user, published_category, 1,
+               pub_date=timezone.now() + timedelta(days=1))
+
+    locs = _locs(_shard(client, "posts", 0))
+    assert [loc.rsplit("/", 2)[1] for loc in locs] == [
+        str(posts[0].pk), str(posts[2].pk), str(posts[3].pk)]
+    assert [loc.rstrip("/").rsplit("/", 1)[1] for loc in _locs(
+        _shard(client, "profiles", 0))] == [user.username], (
+        "Убедитесь, что в карту попадают профили только авторов с "
+        "видимыми публикациями."
+    )
+    assert len(_locs(_shard(client, "categories", 0))) == 1
+
+
+def test_shard_is_served_from_file_cache(client, user, published_category,
+                                         tmp_path, make_posts):
+    posts = make_posts(user, published_category, 7)
+    first = _locs(_shard(client, "posts", 0))
+    assert len(first) == 5
+    assert len(list(tmp_path.glob("posts-0-*.xml"))) == 1
+
+    cached = _shard(client, "posts", 0)
+    assert cached.__class__.__name__ == "FileResponse", (
+        "Убедитесь, что готовый шард отдаётся из файлового кеша."
+    )
+    assert _locs(cached) == first
+
+    # Правка поста из второго шарда первый шард не трогает.
+    posts[6].title = "Новое название"
+    posts[6].save()
+    assert _shard(client, "posts", 0).__class__.__name__ == "FileResponse"
+
+    posts[0].delete()
+    regenerated = _shard(client, "posts", 0)
+    assert regenerated.__class__.__name__ == "StreamingHttpResponse"
+    assert len(_locs(regenerated)) == 4
+    assert len(list(tmp_path.glob("posts-0-*.xml"))) == 1, (
+        "Убедитесь, что устаревший файл шарда удаляется."
+    )
+
+
+def test_process_keeps_other_processes_files(client, user, tmp_path,
+                                             published_category, make_posts):
+    make_posts(user, published_category, 2)
+    foreign = tmp_path / "posts-0-pid1-0123456789abcdef-0.xml"
+    foreign.write_text("<urlset/>")
+
+    assert len(_locs(_shard(client, "posts", 0))) == 2
+    assert foreign.exists(), (
+        "Убедитесь, что процесс с собственным кешем не удаляет файлы "
+        "шардов, записанные другими процессами."
+    )
+    assert len(list(tmp_path.glob(f"posts-0-pid{os.getpid()}-*.xml"))) == 1
+
+
+def test_shared_cache_shares_files(client, user, published_category,
+                                   settings, tmp_path, make_posts):
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path / "cache"),
+    }}
+    make_posts(user, published_category, 2)
+    _locs(_shard(client, "posts", 0))
+    assert len(list(tmp_path.glob("posts-0-shared-*.xml"))) == 1
+
+
+def test_scheduled_post_expires_cached_shard(client, user, published_category,
+                                             monkeypatch, make_posts):
+    make_posts(user, published_category, 1)
+    make_posts(user, published_category, 1,
+               pub_date=timezone.now() + timedelta(minutes=5))
+    assert len(_locs(_shard(client, "posts", 0))) == 1
+
+    later = timezone.now() + timedelta(minutes=10)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert len(_locs(_shard(client, "posts", 0))) == 2
+
+
+@pytest.mark.parametrize("change", ["unpublish", "delete"])
+def test_category_change_resets_post_and_profile_shards(
+        client, user, published_category, make_posts, change):
+    make_posts(user, published_category, 2)
+    for section in ("posts", "profiles"):
+        assert _locs(_shard(client, section, 0))
+
+    if change == "delete":
+        published_category.delete()
+    else:
+        published_category.is_published = False
+        published_category.save()
+    for section in ("posts", "profiles"):
+        assert _locs(_shard(client, section, 0)) == [], (
+            "Убедитесь, что изменение видимости категории сбрасывает "
+            f"шарды `{section}` с её постами."
+        )
+
+
+def test_unknown_shards(client, user, published_category, make_posts):
+    make_posts(user, published_category, 2)
+    assert _shard(client, "posts", 3).status_code == HTTPStatus.NOT_FOUND
+    assert _shard(client, "tags", 0).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_interrupted_generation_leaves_no_file(client, user,
+                                               published_category, tmp_path,
+                                               make_posts):
+    make_posts(user, published_category, 5)
+    response = _shard(client, "posts", 0)
+    next(iter(response.streaming_content))
+    response.close()
+    assert not list(tmp_path.iterdir())
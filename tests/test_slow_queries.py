@@ -0,0 +1,81 @@
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+
+from core import queries
+from core.models import SlowQueryRecord
+from core.queries import query_shape
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def slow_log(settings, caplog, monkeypatch):
+    # Порог 0: медленными считаются все запросы. Файл журнала не трогаем.
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    logger = logging.getLogger("core.slow_queries")
+    monkeypatch.setattr(logger, "handlers", [caplog.handler])
+    return caplog
+
+
+def test_query_shape_ignores_values():
+    assert query_shape(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s) AND s = 'x'  LIMIT 10"
+    ) == query_shape("SELECT * FROM t WHERE id IN (%s) AND s = 'y' LIMIT 20")
+
+
+def test_slow_queries_are_recorded(client, post_with_published_location,
+                                   slow_log):
+    url = reverse("blog:post_detail", args=(post_with_published_location.pk,))
+    client.get(url)
+
+    record = SlowQueryRecord.objects.get(sql__contains='FROM "blog_post"')
+    assert record.view_name == "blog:post_detail"
+    assert record.location.startswith("blog/views.py:"), (
+        "Убедитесь, что у медленного запроса записано место в коде блога."
+    )
+    assert record.plan, "Убедитесь, что для SELECT сохраняется план EXPLAIN."
+
+    entries = [json.loads(message) for message in slow_log.messages]
+    assert {entry["view"] for entry in entries} == {"blog:post_detail"}
+    assert all(entry["duration_ms"] >= 0 for entry in entries)
+
+
+def test_explain_runs_once_per_shape(client, post_with_published_location,
+                                     slow_log, monkeypatch):
+    explained = []
+    original = queries.explain
+    monkeypatch.setattr(
+        queries, "explain",
+        lambda sql, params: explained.append(sql) or original(sql, params),
+    )
+    url = reverse("blog:post_detail", args=(post_with_published_location.pk,))
+    client.get(url)
+    first = len(explained)
+    client.get(url)
+
+    assert len(explained) == first, (
+        "Убедитесь, что EXPLAIN выполняется один раз на форму запроса."
+    )
+    record = SlowQueryRecord.objects.get(sql__contains='FROM "blog_post"')
+    assert record.calls == 2
+    assert not SlowQueryRecord.objects.filter(
+        sql__contains="blog_slowqueryrecord").exists(), (
+        "Убедитесь, что собственные запросы журнала в него не попадают."
+    )
+
+
+def test_disabled_without_threshold(client, settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = None
+    client.get(reverse("blog:index"))
+    assert not SlowQueryRecord.objects.exists()
+
+
+def test_admin_lists_slow_queries(admin_client, slow_log):
+    admin_client.get(reverse("blog:index"))
+    response = admin_client.get(
+        reverse("admin:core_slowqueryrecord_changelist"))
+    assert response.status_code == 200
+    assert "blog:index" in response.content.decode()
@@ -0,0 +1,83 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from blog.images import process_post_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMAGE_WORKERS = 0
+    return tmp_path
+
+
+def _image(color, size=(100, 100), name="photo.JPG"):
+    img_io = BytesIO()
+    Image.new("RGB", size, color=color).save(img_io, format="JPEG")
+    return ImageFile(img_io, name=name)
+
+
+def test_same_content_stored_once(media_root):
+    first = default_storage.save("post_image/a.txt", ContentFile(b"data"))
+    second = default_storage.save("post_image/b.txt", ContentFile(b"data"))
+    assert first == second, (
+        "Убедитесь, что одинаковые загрузки сохраняются в один файл."
+    )
+    directory, shard_a, shard_b, filename = first.split("/")
+    assert directory == "post_image"
+    assert filename.startswith(shard_a + shard_b)
+    assert filename.endswith(".txt")
+    files = [p for p in media_root.rglob("*") if p.is_file()]
+    assert len(files) == 1, "Убедитесь, что временные файлы удаляются."
+
+
+def test_shared_file_deleted_with_last_post(
+        mixer, user, published_category, media_root,
+        django_capture_on_commit_callbacks):
+    posts = [
+        mixer.blend("blog.Post", author=user, category=published_category,
+                    image=_image((1, 2, 3)))
+        for _ in range(2)
+    ]
+    name = posts[0].image.name
+    assert posts[1].image.name == name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[0].delete()
+    assert default_storage.exists(name), (
+        "Убедитесь, что файл, которым пользуется другой пост, не удаляется."
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[1].delete()
+    assert not default_storage.exists(name), (
+        "Убедитесь, что осиротевший файл удаляется вместе с постом."
+    )
+
+
+def test_replaced_image_and_variants_deleted(
+        mixer, user, published_category,
+        django_capture_on_commit_callbacks):
+    post = mixer.blend("blog.Post", author=user, category=published_category,
+                       image=_image((1, 2, 3), size=(1000, 500)))
+    old_name = post.image.name
+    variants = process_post_image(post.pk, old_name)
+    post.refresh_from_db()
+    variant_names = [size["webp"] for size in variants["sizes"]]
+    assert all(default_storage.exists(name) for name in variant_names)
+
+    post.image = _image((4, 5, 6))
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert default_storage.exists(post.image.name)
+    assert not default_storage.exists(old_name)
+    assert not any(default_storage.exists(name) for name in variant_names), (
+        "Убедитесь, что вместе со старой картинкой удаляются её копии."
+    )